@@ -3,6 +3,7 @@
 import argparse
 import datetime
 import os
+import re
 from pathlib import Path
 
 import docker
@@ -19,10 +20,19 @@ from .util import capture_logs, log
 
 CONTAINER_IMAGE_ID = "kvstore-hw4-test"
 TEST_GROUP_ID = "hw4"
+EXTERNAL_PORT_BASE = 9000
+# external ports set aside for each --shard, enough for the largest cluster a test spawns
+SHARD_PORT_STRIDE = 100
 
 
 class TestRunner:
-    def __init__(self, project_dir: str, docker_client: docker.DockerClient):
+    def __init__(
+        self,
+        project_dir: str,
+        docker_client: docker.DockerClient,
+        group_id: str = TEST_GROUP_ID,
+        external_port_base: int = EXTERNAL_PORT_BASE,
+    ):
         self.project_dir = project_dir
         # builder to build container image
         self.builder = ContainerBuilder(
@@ -33,12 +43,12 @@ class TestRunner:
         # network manager to mess with container networking
         self.conductor = ClusterConductor(
             docker_client=docker_client,
-            group_id=TEST_GROUP_ID,
+            group_id=group_id,
             base_image=CONTAINER_IMAGE_ID,
-            external_port_base=9000,
+            external_port_base=external_port_base,
         )
 
-    def prepare_environment(self) -> None:
+    def prepare_environment(self, group_only: bool = False) -> None:
         log("\n-- prepare_environment --")
         # build the container image
         if os.environ.get("KVS_SKIP_BUILD") == "1":
@@ -46,29 +56,52 @@ class TestRunner:
         else:
             self.builder.build_image()
 
-        # aggressively clean up anything kvs-related
-        # NOTE: this disallows parallel run processes, so turn it off for that
-        self.conductor.cleanup_hanging(group_only=False)
+        # aggressively clean up anything kvs-related on CI, where stale state from other runs is likely;
+        # locally only this group is cleaned so startup doesn't scan every container on the host
+        # NOTE: the aggressive cleanup disallows parallel run processes, so turn it off for that
+        # (group_only is forced for --shard, whose sibling shards run at the same time)
+        full_cleanup = not group_only and os.environ.get("CI") == "true" and os.environ.get("KVS_FAST_TEARDOWN") != "1"
+        self.conductor.cleanup_hanging(group_only=not full_cleanup)
 
     def cleanup_environment(self) -> None:
         log("\n-- cleanup_environment --")
-        # destroy the cluster
+        # destroy the cluster (this also cleans up anything left over from this group)
         self.conductor.destroy_cluster()
-        # aggressively clean up anything kvs-related
-        # NOTE: this disallows parallel run processes, so turn it off for that
-        self.conductor.cleanup_hanging(group_only=True)
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    try:
+        k, n = map(int, value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {value!r}")
+    if not 1 <= k <= n:
+        raise argparse.ArgumentTypeError(f"shard {k} is not between 1 and {n}")
+    return k, n
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Run KVS cluster tests")
     parser.add_argument("path", help="Path to the project directory containing Dockerfile")
-    parser.add_argument("-f", "--filter", help="Filter tests by name")
+    parser.add_argument("-f", "--filter", help="Filter tests by name (comma-separated to match any of several)")
     parser.add_argument(
         "--no-fail-fast",
         action="store_false",
         dest="fail_fast",
         help="Continue testing even if a test case fails",
     )
+    parser.add_argument(
+        "--reuse-cluster",
+        action="store_true",
+        help="Keep a passing test's nodes running and restart them for the next test's cluster",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="K/N",
+        help="Run only the K-th of N slices of the tests, with its own containers and ports, "
+        "so N runner processes can split the suite",
+    )
     parser.add_argument(
         "--output-dir",
         type=Path,
@@ -91,10 +124,21 @@ def main():
 
     # use provided project directory path
     project_dir = args.path
-    runner = TestRunner(project_dir=project_dir, docker_client=docker.from_env())
+    if args.shard is None:
+        runner = TestRunner(project_dir=project_dir, docker_client=docker.from_env())
+    else:
+        # each shard gets its own container/network names and port range so shards don't collide;
+        # "-s" rather than "_s" so the unsharded group's "kvs_hw4_" prefix doesn't match shard resources
+        shard, _ = args.shard
+        runner = TestRunner(
+            project_dir=project_dir,
+            docker_client=docker.from_env(),
+            group_id=f"{TEST_GROUP_ID}-s{shard}",
+            external_port_base=EXTERNAL_PORT_BASE + shard * SHARD_PORT_STRIDE,
+        )
 
     # prepare to run tests
-    runner.prepare_environment()
+    runner.prepare_environment(group_only=args.shard is not None)
 
     # Select appropriate test set and KvsFixture class based on hw arg
     if args.hw == 2:
@@ -133,11 +177,21 @@ def main():
     if args.output_dir is None:
         args.output_dir = Path(args.path, "test_results")
     output_dir = args.output_dir / datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    if args.shard is not None:
+        output_dir = output_dir.with_name(f"{output_dir.name}_shard{args.shard[0]}of{args.shard[1]}")
 
     # apply test filter if provided
     if args.filter:
         log(f"filtering tests by: {args.filter}")
-        tests = [t for t in tests if args.filter in t.name]
+        # one alternation of escaped terms matches any of them in a single scan per name
+        filter_regex = re.compile("|".join(re.escape(term) for term in args.filter.split(",") if term))
+        tests = [t for t in tests if filter_regex.search(t.name)]
+
+    # take every N-th test so slow tests spread across shards
+    if args.shard is not None:
+        shard, num_shards = args.shard
+        tests = tests[shard - 1 :: num_shards]
+        log(f"running shard {shard}/{num_shards}: {len(tests)} tests")
 
     # run tests
     log("\n== RUNNING TESTS ==")
@@ -154,12 +208,18 @@ def main():
             with runner.conductor:
                 # record clients created to save logs later
                 fx = KvsFixture()
-                score, reason = test.execute(runner.conductor, fx)
-                # dump container logs
-                runner.conductor.dump_logs(path=test_dir / "nodes")
-                # dump client logs
-                for client in fx.clients:
-                    client.dump_logs(path=test_dir / "clients")
+                try:
+                    score, reason = test.execute(runner.conductor, fx)
+                    # dump container logs
+                    runner.conductor.dump_logs(path=test_dir / "nodes")
+                    # dump client logs
+                    for client in fx.clients:
+                        client.dump_logs(path=test_dir / "clients")
+                finally:
+                    # release pooled client connections, even if dumping the logs failed
+                    fx.close()
+                # only hand a cluster on if the test left it in a known-good state
+                runner.conductor.keep_warm = args.reuse_cluster and bool(score)
 
             log("\n")
             if score:
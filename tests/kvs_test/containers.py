@@ -1,4 +1,6 @@
-import re
+import hashlib
+import os
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
@@ -6,10 +8,19 @@ from typing import List
 
 import docker
 import docker.errors
+import docker.models.containers
+import docker.models.networks
 import docker.types
 import requests
 
-from .util import log
+from .util import log, parallel_map
+
+# build output is forwarded to the log in batches of this size/age
+BUILD_LOG_FLUSH_BYTES = 64 * 1024
+BUILD_LOG_FLUSH_INTERVAL_S = 1.0
+
+# image healthchecks slower than this are ignored in favour of polling /ping
+HEALTHCHECK_MAX_INTERVAL_NS = 1_000_000_000
 
 
 class ContainerBuilder:
@@ -21,12 +32,36 @@ class ContainerBuilder:
     def build_image(self) -> None:
         # ensure we are able to build the container image
         log(f"building container image {self.image_id}...")
-        build_result = self.client.api.build(path=self.project_dir, rm=True, nocache=True, tag=self.image_id)
+        # reuse layers from the previous build unless a clean build is requested
+        nocache = os.environ.get("KVS_NO_CACHE") == "1"
+        build_result = self.client.api.build(
+            path=self.project_dir,
+            rm=True,
+            nocache=nocache,
+            cache_from=[self.image_id],
+            tag=self.image_id,
+            decode=True,
+        )
 
-        # Consume the generator to ensure the build completes
+        # Consume the generator to ensure the build completes, batching its output
+        pending: list[str] = []
+        pending_size = 0
+        last_flush = time.monotonic()
         for chunk in build_result:
-            if isinstance(chunk, dict) and "error" in chunk:
+            if "error" in chunk:
                 raise Exception(f"Build error: {chunk['error']}")
+            if text := chunk.get("stream"):
+                pending.append(text)
+                pending_size += len(text)
+            if pending and (
+                pending_size >= BUILD_LOG_FLUSH_BYTES or time.monotonic() - last_flush >= BUILD_LOG_FLUSH_INTERVAL_S
+            ):
+                log("".join(pending).rstrip("\n"))
+                pending.clear()
+                pending_size = 0
+                last_flush = time.monotonic()
+        if pending:
+            log("".join(pending).rstrip("\n"))
 
         # ensure the image exists
         log(f"inspecting container image {self.image_id}...")
@@ -39,7 +74,7 @@ class ContainerBuilder:
         self.client.api.prune_images(filters={})
 
 
-@dataclass
+@dataclass(slots=True)
 class ClusterNode:
     name: str  # container name
     index: int  # container global id/index
@@ -47,6 +82,7 @@ class ClusterNode:
     port: int  # container http service port
     external_port: int  # host's mapped external port forwarded to container's service port
     networks: List[str]  # networks the container is attached to
+    container_id: str  # docker id; unlike the name, never shared with an earlier container
 
     def internal_endpoint(self) -> str:
         return f"http://{self.ip}:{self.port}"
@@ -72,6 +108,7 @@ class ClusterConductor:
         self.base_image = base_image
         self.base_port = external_port_base
         self.nodes: List[ClusterNode] = []
+        self._nodes_lock = threading.Lock()
         self.client = docker_client
 
         # naming patterns
@@ -84,8 +121,21 @@ class ClusterConductor:
         # network subnet mappings
         self.network_subnets = {}
 
+        # network handles by name, so repeated connect/disconnect calls skip the lookup round-trip
+        self._net_cache: dict[str, docker.models.networks.Network] = {}
+
         self.wait_online_timeout_s = 10
 
+        # whether the base image defines a usable HEALTHCHECK, looked up on first spawn
+        self._base_image_healthcheck: bool | None = None
+
+        # when set, a passing test's nodes are kept running on exit and handed to the next test
+        # that spawns a cluster of the same size, instead of being torn down and respawned
+        self.keep_warm = False
+        self._warm_nodes: List[ClusterNode] = []
+        # reused containers keep their old logs, so only dump logs written since the reset
+        self._logs_since: int | None = None
+
     @property
     def base_net(self) -> NetworkHandle:
         return NetworkHandle(name=self.base_net_name)
@@ -96,7 +146,16 @@ class ClusterConductor:
 
     def _list_networks(self) -> List[str]:
         # get list of all network names
-        return [n["Name"] for n in self.client.api.networks()]
+        return list(self._network_snapshot())
+
+    def _network_snapshot(self) -> dict[str, list[str]]:
+        # map every network name to its subnets; the list endpoint already
+        # includes IPAM config, so this is a single round-trip
+        snapshot = {}
+        for n in self.client.api.networks():
+            config = (n.get("IPAM") or {}).get("Config") or []
+            snapshot[n["Name"]] = [c["Subnet"] for c in config if "Subnet" in c]
+        return snapshot
 
     def _remove_container(self, name: str) -> None:
         # remove a single container
@@ -106,61 +165,66 @@ class ClusterConductor:
     def dump_logs(self, path: Path) -> None:
         """Dump container logs to files"""
         path.mkdir(parents=True, exist_ok=True)
-
-        for node in self.nodes:
-            log_file = path / f"{node.name}"
-            with log_file.open("wb") as f:
-                logs = self.client.api.logs(container=node.name, stdout=True, stderr=True)
-                f.write(logs)
-                log(f"dumped logs to {log_file}")
+        parallel_map(lambda node: self._dump_node_logs(node, path), self.nodes)
+
+    def _dump_node_logs(self, node: ClusterNode, path: Path) -> None:
+        # stream the log straight to disk rather than holding it all in memory
+        log_file = path / f"{node.name}"
+        with log_file.open("wb") as f:
+            logs = self.client.api.logs(
+                container=node.name, stdout=True, stderr=True, stream=True, follow=False, since=self._logs_since
+            )
+            for chunk in logs:
+                f.write(chunk)
+        log(f"dumped logs to {log_file}")
+
+    def _net(self, name: str) -> docker.models.networks.Network:
+        # get a network handle, looking it up only on first use
+        net = self._net_cache.get(name)
+        if net is None:
+            net = self._net_cache[name] = self.client.networks.get(name)
+        return net
 
     def _remove_network(self, name: str) -> None:
         # remove a single network
         log(f"removing network {name}")
-        self.client.networks.get(name).remove()
-
-    def _list_subnets(self, net_name: str) -> list[str]:
-        config = self.client.networks.get(net_name).attrs["IPAM"]["Config"]
-        if config is None:
-            return []
-        return [c["Subnet"] for c in config]
+        self._net(name).remove()
+        self._net_cache.pop(name, None)
 
     def create_network(self, name: str) -> NetworkHandle:
         log(f"creating network {name}")
 
-        # check if network already exists
-        exists = True
+        # take one snapshot of existing networks and their subnets
         try:
-            self.client.networks.get(name)
-        except docker.errors.NotFound:
-            exists = False
+            snapshot = self._network_snapshot()
+        except docker.errors.APIError as e:
+            log(f"warning: error getting network info: {str(e)}")
+            raise
 
-        if exists:
+        if name in snapshot:
             # network exists, get its subnet
-            self.network_subnets[name] = self._list_subnets(net_name=name)[0]
+            self.network_subnets[name] = snapshot[name][0]
             log(f"network {name} already exists with subnet {self.network_subnets[name]}")
             return NetworkHandle(name=name)
 
         # get subnets that are definitely in use
-        try:
-            used_subnets = {s for n in self._list_networks() for s in self._list_subnets(n)}
-        except docker.errors.APIError as e:
-            log(f"warning: error getting network info: {str(e)}")
-            raise
+        used_subnets = {s for subnets in snapshot.values() for s in subnets}
 
         # try creating network with different subnets
         max_retries = 10
+        # builtin hash() of a str is salted per process, so derive a stable value from the name instead
+        name_hash = int.from_bytes(hashlib.blake2s(name.encode(), digest_size=4).digest(), "little")
         for attempt in range(max_retries):
             # try different subnets (randomize to avoid conflicts between multiple processes)
             second_octet = 16 + (attempt % 16)
-            third_octet = (attempt * 7 + hash(name)) % 256  # deterministic but varies by name
+            third_octet = (attempt * 7 + name_hash) % 256  # deterministic but varies by name
 
             subnet = f"172.{second_octet}.{third_octet}.0/24"
             if subnet in used_subnets:
                 continue
 
             try:
-                self.client.networks.create(
+                self._net_cache[name] = self.client.networks.create(
                     name=name,
                     ipam=docker.types.IPAMConfig(pool_configs=[docker.types.IPAMPool(subnet=subnet)]),
                 )
@@ -179,43 +243,33 @@ class ClusterConductor:
         # if we get here, we've exhausted all retries
         raise RuntimeError(f"failed to create network {name} after {max_retries} attempts")
 
-    def _network_exists(self, name: str) -> bool:
-        return name in self._list_networks()
-
     def cleanup_hanging(self, group_only: bool = True) -> None:
         # if group_only, only clean up stuff for this group
         # otherwise clean up anything kvs related
         if group_only:
             log(f"cleaning up group {self.group_id}")
-            container_pattern = f"^kvs_{self.group_id}_.*"
-            network_pattern = f"^kvs_{self.group_id}_net_.*"
+            container_prefix = f"kvs_{self.group_id}_"
+            network_prefix = f"kvs_{self.group_id}_net_"
         else:
             log("cleaning up all kvs containers and networks")
-            container_pattern = "^kvs_.*"
-            network_pattern = "^kvs_net_.*"
-
-        # compile regex patterns
-        container_regex = re.compile(container_pattern)
-        network_regex = re.compile(network_pattern)
+            container_prefix = "kvs_"
+            network_prefix = "kvs_net_"
 
-        # cleanup containers
+        # cleanup containers (each removal is an independent round-trip, so do them concurrently)
         log(f"  cleaning up {'group' if group_only else 'all'} containers")
-        containers = self._list_containers()
-        for container in containers:
-            if container and container_regex.match(container):
-                self._remove_container(container)
+        containers = [c for c in self._list_containers() if c.startswith(container_prefix)]
+        parallel_map(self._remove_container, containers, max_workers=8)
 
         # cleanup networks
         log(f"  cleaning up {'group' if group_only else 'all'} networks")
-        networks = self._list_networks()
-        for network in networks:
-            if network and network_regex.match(network):
-                self._remove_network(network)
+        networks = [n for n in self._list_networks() if n.startswith(network_prefix)]
+        parallel_map(self._remove_network, networks, max_workers=8)
 
     # we can check if a node is online by GET /ping
     def _is_online(self, node: ClusterNode) -> bool:
         try:
-            r = requests.get(f"{node.external_endpoint()}/ping", timeout=10)
+            # short timeout so a node that is still booting doesn't stall the readiness round
+            r = requests.get(f"{node.external_endpoint()}/ping", timeout=0.5)
             return r.status_code == 200
         except requests.exceptions.RequestException as e:
             log(f"node {node.name} is not online: {e}")
@@ -224,40 +278,147 @@ class ClusterConductor:
     def _node_name(self, index: int) -> str:
         return f"kvs_{self.group_id}_node_{index}"
 
-    def _get_container_ip(self, container_name: str, network_name: str) -> str:
+    def _get_container_ip(self, container: docker.models.containers.Container, network_name: str) -> str:
+        # refresh the container object we already hold rather than looking it up by name
         try:
-            attrs = self.client.containers.get(container_name).attrs
+            container.reload()
         except docker.errors.APIError as e:
-            log(f"failed to inspect container {container_name}")
+            log(f"failed to inspect container {container.name}")
             log(e)
             raise
-        container_ip = attrs["NetworkSettings"]["Networks"][network_name]["IPAddress"]
+        container_ip = container.attrs["NetworkSettings"]["Networks"][network_name]["IPAddress"]
         return container_ip
 
+    def _get_network_ips(self, net: docker.models.networks.Network) -> dict[str, str]:
+        # one network inspect lists the ip of every attached container, keyed by container name
+        try:
+            net.reload()
+        except docker.errors.APIError as e:
+            log(f"failed to inspect network {net.name}")
+            log(e)
+            raise
+        containers = net.attrs.get("Containers") or {}
+        return {c["Name"]: c["IPv4Address"].split("/")[0] for c in containers.values()}
+
     # create a cluster of nodes on the base network
     def spawn_cluster(self, node_count: int) -> list[ClusterNode]:
+        reused = []
+        if self._warm_nodes:
+            if self.nodes:
+                # the warm nodes' container names would clash with the new nodes
+                self._discard_warm_cluster()
+            else:
+                # a warm cluster of any size helps: reuse up to node_count of it and spawn the rest
+                self._discard_warm_cluster(keep=node_count)
+                reused = self._reuse_warm_cluster()
+                node_count -= len(reused)
+                if node_count == 0:
+                    return reused
+
         log(f"spawning cluster of {node_count} nodes")
+        if not reused:
+            self._logs_since = None
 
-        spawned = [self.spawn_node(network=self.base_net) for _ in range(node_count)]
+        # docker event timestamps are wall-clock seconds
+        spawn_start = time.time()
 
-        # wait for the nodes to come online (sequentially)
-        log("waiting for nodes to come online...")
-        wait_online_start = time.time()
-        for node in spawned:
-            while not self._is_online(node):
-                if time.time() - wait_online_start > self.wait_online_timeout_s:
-                    raise RuntimeError(f"node {node.name} did not come online")
-                time.sleep(0.2)
+        # reserve indices up front so containers can be started concurrently
+        first_idx = len(self.nodes)
+        indices = range(first_idx, first_idx + node_count)
+        spawned = parallel_map(lambda idx: self._start_node(idx, self.base_net), indices)
+
+        # record nodes in index order regardless of which container came up first
+        with self._nodes_lock:
+            self.nodes.extend(spawned)
 
-            log(f"  node {node.name} online")
+        log("waiting for nodes to come online...")
+        # one deadline covers both waits, so the /ping fallback doesn't restart the clock
+        deadline = time.monotonic() + self.wait_online_timeout_s
+        pending = spawned
+        if self._image_has_fast_healthcheck():
+            pending = self._wait_healthy(spawned, since=spawn_start, deadline=deadline)
+        # fall back to polling /ping for anything that didn't report healthy
+        self._wait_online(pending, deadline=deadline)
 
         log("all nodes online")
 
-        return spawned
+        return reused + spawned
+
+    def _image_has_fast_healthcheck(self) -> bool:
+        # only images with a HEALTHCHECK report health_status events, and waiting on them only
+        # pays off if the first check runs quickly (docker's default interval is 30s)
+        if self._base_image_healthcheck is None:
+            config = self.client.api.inspect_image(self.base_image).get("Config") or {}
+            healthcheck = config.get("Healthcheck") or {}
+            test = healthcheck.get("Test") or ["NONE"]
+            interval_ns = healthcheck.get("StartInterval") or healthcheck.get("Interval") or 0
+            self._base_image_healthcheck = test[0] != "NONE" and 0 < interval_ns <= HEALTHCHECK_MAX_INTERVAL_NS
+        return self._base_image_healthcheck
+
+    def _wait_healthy(self, nodes: list[ClusterNode], since: float, deadline: float) -> list[ClusterNode]:
+        # block on the daemon's event stream until every container reports healthy or unhealthy;
+        # replaying from `since` catches containers that turned healthy before we subscribed.
+        # events are matched on container ids, which a same-named container removed in the replayed
+        # window can't share. returns the nodes that did not report healthy in time
+        by_id = {node.container_id: node for node in nodes}
+        pending = set(by_id)
+        healthy = set()
+        # the event stream takes wall-clock timestamps, the deadline is monotonic
+        until = time.time() + max(deadline - time.monotonic(), 0)
+        events = self.client.events(
+            since=int(since),
+            until=int(until) + 1,
+            filters={"type": "container", "container": list(pending)},
+            decode=True,
+        )
+        try:
+            for event in events:
+                container_id = event.get("Actor", {}).get("ID")
+                if container_id not in pending:
+                    continue
+                action = event.get("Action")
+                if action == "health_status: healthy":
+                    healthy.add(container_id)
+                    log(f"  node {by_id[container_id].name} online")
+                elif action == "health_status: unhealthy":
+                    # the healthcheck may just not suit this node; leave it to the /ping fallback now
+                    log(f"  node {by_id[container_id].name} reported unhealthy, polling /ping instead")
+                else:
+                    continue
+                pending.discard(container_id)
+                if not pending:
+                    break
+        finally:
+            events.close()
+
+        return [node for node in nodes if node.container_id not in healthy]
+
+    def _wait_online(self, nodes: list[ClusterNode], deadline: float | None = None) -> None:
+        # probe every pending node each round until all answer /ping
+        if deadline is None:
+            deadline = time.monotonic() + self.wait_online_timeout_s
+        pending = list(nodes)
+        while pending:
+            online = parallel_map(self._is_online, pending)
+            for node, is_online in zip(pending, online):
+                if is_online:
+                    log(f"  node {node.name} online")
+            pending = [node for node, is_online in zip(pending, online) if not is_online]
+            if not pending:
+                break
+
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"nodes {[node.name for node in pending]} did not come online")
+            time.sleep(0.05)
 
     def spawn_node(self, network: NetworkHandle) -> ClusterNode:
-        # spawn the nodes
-        node_idx = len(self.nodes)
+        node = self._start_node(len(self.nodes), network)
+        with self._nodes_lock:
+            self.nodes.append(node)
+        return node
+
+    def _start_node(self, node_idx: int, network: NetworkHandle) -> ClusterNode:
+        # spawn the node; touches no shared state so it can run on a worker thread
         node_name = self._node_name(node_idx)
         # map to sequential external port
         external_port = self.base_port + node_idx
@@ -266,7 +427,7 @@ class ClusterConductor:
         log(f"  starting container {node_name} (ext_port={external_port})")
 
         # start container detached from networks
-        self.client.containers.run(
+        container = self.client.containers.run(
             image=self.base_image,
             detach=True,
             name=node_name,
@@ -275,15 +436,18 @@ class ClusterConductor:
             ports={f"{port}": external_port},
         )
 
+        if container.id is None:
+            raise RuntimeError(f"container {node_name} started without an id")
+
         # attach container to base network
         log(f"    attaching container {node_name} to base network")
-        self.client.networks.get(network.name).connect(node_name)
+        self._net(network.name).connect(node_name)
 
         # inspect the container to get ip, etc.
         log(f"    inspecting container {node_name}")
-        container_ip = self._get_container_ip(node_name, self.base_net_name)
+        container_ip = self._get_container_ip(container, self.base_net_name)
 
-        # store container metadata
+        # build container metadata
         node = ClusterNode(
             name=node_name,
             index=node_idx,
@@ -291,8 +455,8 @@ class ClusterConductor:
             port=port,
             external_port=external_port,
             networks=[self.base_net_name],
+            container_id=container.id,
         )
-        self.nodes.append(node)
 
         log(f"    container {node_name} spawned, base_net_ip={container_ip}")
 
@@ -304,6 +468,57 @@ class ClusterConductor:
 
         # clear nodes
         self.nodes.clear()
+        self._warm_nodes.clear()
+
+    def _reuse_warm_cluster(self) -> list[ClusterNode]:
+        # put the kept nodes back into a fresh-cluster state: only on the base network, freshly restarted
+        nodes, self._warm_nodes = self._warm_nodes, []
+        log(f"reusing warm cluster of {len(nodes)} nodes")
+
+        base_net = self._net(self.base_net_name)
+        for node in nodes:
+            for network in node.networks:
+                if network != self.base_net_name:
+                    log(f"  disconnecting {node.name} from network {network}")
+                    self._net(network).disconnect(node.name)
+            if self.base_net_name not in node.networks:
+                log(f"  reconnecting {node.name} to base network")
+                base_net.connect(node.name)
+            node.networks = [self.base_net_name]
+
+        # drop the partition networks the previous test created
+        partition_nets = [n for n in self._list_networks() if n.startswith(self.group_net_prefix)]
+        parallel_map(self._remove_network, [n for n in partition_nets if n != self.base_net_name], max_workers=8)
+
+        # restarting clears whatever state the previous test left in each node
+        self._logs_since = int(time.time())
+        log("  restarting containers")
+        parallel_map(lambda node: self.client.api.restart(node.name, timeout=1), nodes)
+
+        # the restart may have handed out new addresses
+        base_ips = self._get_network_ips(base_net)
+        for node in nodes:
+            node.ip = base_ips[node.name]
+
+        with self._nodes_lock:
+            self.nodes.extend(nodes)
+
+        # poll rather than wait on health events, which could still report the pre-restart status
+        log("waiting for nodes to come online...")
+        self._wait_online(nodes)
+
+        log("all nodes online")
+
+        return nodes
+
+    def _discard_warm_cluster(self, keep: int = 0) -> None:
+        # warm nodes are in index order, so keeping a prefix keeps container names contiguous
+        discarded = self._warm_nodes[keep:]
+        if not discarded:
+            return
+        log(f"discarding {len(discarded)} of {len(self._warm_nodes)} warm nodes")
+        parallel_map(lambda node: self._remove_container(node.name), discarded)
+        del self._warm_nodes[keep:]
 
     def describe_cluster(self) -> None:
         log(f"TOPOLOGY: group {self.group_id}")
@@ -329,28 +544,31 @@ class ClusterConductor:
 
         log(f"creating partition {partition_id} with nodes {[n.index for n in nodes]}")
 
-        # create partition network if it doesn't exist
-        if not self._network_exists(net_name):
-            self.create_network(net_name)
+        # create partition network if it doesn't exist (create_network checks for us)
+        self.create_network(net_name)
 
         # disconnect specified nodes from all other networks
         log("  disconnecting nodes from other networks")
         for node in nodes:
-            for network in node.networks:
-                if network != net_name:
-                    log(f"    disconnecting {node.name} from network {network}")
-                    self.client.networks.get(network).disconnect(node.name)
-                    node.networks.remove(network)
+            # don't mutate node.networks while iterating it, that skips every other network
+            other_networks = [network for network in node.networks if network != net_name]
+            for network in other_networks:
+                log(f"    disconnecting {node.name} from network {network}")
+                self._net(network).disconnect(node.name)
+            node.networks = [network for network in node.networks if network == net_name]
 
         # connect nodes to partition network, and update node ip
         log(f"  connecting nodes to partition network {net_name}")
+        partition_net = self._net(net_name)
         for node in nodes:
             log(f"    connecting {node.name} to network {net_name}")
-            self.client.networks.get(net_name).connect(node.name)
+            partition_net.connect(node.name)
             node.networks.append(net_name)
 
-            # update node ip on the new network
-            container_ip = self._get_container_ip(node.name, net_name)
+        # update node ips on the new network, inspecting the network once for all of them
+        network_ips = self._get_network_ips(partition_net)
+        for node in nodes:
+            container_ip = network_ips[node.name]
             log(f"    node {node.name} ip in network {net_name}: {container_ip}")
 
             # update node ip
@@ -358,12 +576,16 @@ class ClusterConductor:
 
         return NetworkHandle(name=net_name)
 
+    def create_partitions(self, partitions: dict[str, list[ClusterNode]]) -> list[NetworkHandle]:
+        """Create several partitions over disjoint node sets at once, keyed by partition id"""
+        return parallel_map(lambda item: self.create_partition(item[1], item[0]), partitions.items())
+
     def simulate_kill_node(self, node: ClusterNode, network: NetworkHandle) -> None:
         # knock a node off the network it's on
         log(f"simulating kill of node {node.name} on network {network.name}")
 
         # disconnect node from network
-        self.client.networks.get(network.name).disconnect(node.name)
+        self._net(network.name).disconnect(node.name)
 
         # remove network from node's list
         node.networks.remove(network.name)
@@ -384,5 +606,12 @@ class ClusterConductor:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.keep_warm and exc_type is None and self.nodes:
+            # park the nodes for the next test; they're reset when it spawns its cluster
+            with self._nodes_lock:
+                self._warm_nodes = list(self.nodes)
+                self.nodes.clear()
+            return
+
         # clean up automatically
         self.destroy_cluster()
@@ -1,11 +1,20 @@
+import itertools
 import json
+import os
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Protocol, Sequence
+from typing import Callable, Protocol, Sequence, TypeVar
 
 import requests
+import requests.adapters
 
-from .util import log
+from .util import log, parallel_map
+
+T = TypeVar("T")
+
+# set KVS_LOG_HTTP_BODIES=0 to leave response bodies out of the client logs
+LOG_HTTP_BODIES = os.environ.get("KVS_LOG_HTTP_BODIES") != "0"
 
 
 class _NodeLike(Protocol):
@@ -25,34 +34,34 @@ class KvsTimeout(Exception):
         return "request timed out"
 
 
-@dataclass
+@dataclass(slots=True)
 class PutResponse:
     status_code: int
     existed: bool
     ok: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class GetResponse:
     status_code: int
     value: str | None
     ok: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class DeleteResponse:
     status_code: int
     ok: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class GetAllResponse:
     status_code: int
     values: dict[str, str]
     ok: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class _LogItem:
     id: int
     url: str
@@ -60,7 +69,7 @@ class _LogItem:
     payload: dict | None
     timed_out: bool
     status_code: int | None
-    response_text: str | None
+    response_body: bytes | None  # raw body, only decoded when the log is dumped
 
     def json(self) -> dict:
         return {
@@ -70,7 +79,9 @@ class _LogItem:
             "payload": self.payload,
             "timed_out": self.timed_out,
             "status_code": self.status_code,
-            "response_text": self.response_text,
+            "response_text": self.response_body.decode("utf-8", errors="replace")
+            if self.response_body is not None
+            else None,
         }
 
 
@@ -78,56 +89,105 @@ class CreateClient(Protocol):
     def __call__(self, name: str) -> "KvsClient": ...
 
 
+def new_session() -> requests.Session:
+    """Create a session that keeps connections to each node alive; safe to share between threads"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=0)
+    session.mount("http://", adapter)
+    return session
+
+
 class KvsFixture:
     def __init__(self):
         self.clients: list[KvsClient] = []
+        # all clients share one connection pool, so concurrent clients reuse each other's connections
+        self.session = new_session()
+        # last view each node accepted, from any client in this test; only accurate as long as every
+        # view PUT goes through a client, so tests never send views on the session directly
+        self.sent_views: dict[str, tuple[tuple[str, int], ...]] = {}
 
     def create_client(self, name: str) -> "KvsClient":
-        client = KvsClient(name=name)
+        client = KvsClient(name=name, session=self.session, sent_views=self.sent_views)
         self.clients.append(client)
         return client
 
+    def close(self) -> None:
+        self.session.close()
+
+    def parallel_map(self, fn: Callable[[_NodeLike], T], nodes: Sequence[_NodeLike]) -> list[T]:
+        """Run fn against every node concurrently, returning results in node order"""
+        return parallel_map(fn, nodes)
+
 
 class KvsClient:
-    def __init__(self, name: str, timeout: int = 10, num_retries: int = 500):
+    def __init__(
+        self,
+        name: str,
+        timeout: int = 10,
+        num_retries: int = 10,
+        retry_backoff: float = 0.05,
+        session: requests.Session | None = None,
+        sent_views: dict[str, tuple[tuple[str, int], ...]] | None = None,
+    ):
         self.name = name
         self.timeout = timeout
         self.num_retries = num_retries
+        self.retry_backoff = retry_backoff
+
+        # reuse keep-alive connections to each node instead of reconnecting per request
+        self._owns_session = session is None
+        self._session = session if session is not None else new_session()
+
+        # base url per node port, built once instead of on every request
+        self._base_urls: dict[int, str] = {}
+
+        # (address, id) pairs of the last view each node accepted; shared with the other clients of
+        # a fixture, so a view sent by one isn't skipped by another
+        self._sent_views = sent_views if sent_views is not None else {}
 
         self._log: list[_LogItem] = []
-        self._id = 0
+        # next() on a count is atomic, so ids stay unique when requests are sent from several threads
+        self._ids = itertools.count()
+
+    def close(self) -> None:
+        # a shared session belongs to the fixture that created it
+        if self._owns_session:
+            self._session.close()
 
     def _new_id(self) -> int:
-        id = self._id
-        self._id += 1
-        return id
+        return next(self._ids)
 
     def dump_logs(self, path: Path) -> None:
         """Dump the logs to a file"""
         path.mkdir(parents=True, exist_ok=True)
-        with (path / f"{self.name}.jsonl").open("w") as f:
-            for item in self._log:
-                json.dump(item.json(), f)
-                f.write("\n")
+        # encode everything up front and write it in one go, using compact separators
+        lines = [json.dumps(item.json(), separators=(",", ":")) + "\n" for item in self._log]
+        (path / f"{self.name}.jsonl").write_text("".join(lines), encoding="utf-8")
 
     def _base_url(self, node: _NodeLike) -> str:
-        return f"http://localhost:{node.external_port}"
+        url = self._base_urls.get(node.external_port)
+        if url is None:
+            url = self._base_urls[node.external_port] = f"http://localhost:{node.external_port}/"
+        return url
 
     def _request(self, corr_id: int, node: _NodeLike, method: str, path: str, **kwargs) -> requests.Response:
         # send request, but handle some exceptions
-        url = f"{self._base_url(node)}/{path.lstrip('/')}"
+        # paths are always relative ("ping", "data/<key>", "view")
+        url = self._base_url(node) + path
         response = None
         timed_out = False
         try:
             for i in range(self.num_retries):
                 try:
-                    response = getattr(requests, method)(url, timeout=self.timeout, **kwargs)
+                    response = self._session.request(method.upper(), url, timeout=self.timeout, **kwargs)
                     # check if the response is a server error
                     if response.status_code == 500:
                         return response
                     break
                 except requests.exceptions.ConnectionError:
-                    continue
+                    # back off exponentially (capped at 1s) so an unreachable node isn't hammered
+                    if i < self.num_retries - 1:
+                        time.sleep(min(self.retry_backoff * 2**i, 1.0))
             if response is None:
                 raise KvsClientException(f"failed to connect after {self.num_retries} attempts")
 
@@ -145,7 +205,7 @@ class KvsClient:
                     method=method,
                     payload=kwargs.get("json"),
                     status_code=response.status_code if response is not None else None,
-                    response_text=response.text if response is not None else None,
+                    response_body=response.content if response is not None and LOG_HTTP_BODIES else None,
                     timed_out=timed_out,
                 )
             )
@@ -172,7 +232,7 @@ class KvsClient:
             raise ValueError("key cannot be empty")
         res = self._request(id, node, "get", f"data/{key}")
         if res.ok:
-            value = res.json()["value"]
+            value = json.loads(res.content)["value"]
             log(f"client {self.name} [{id}] -> {node.name}: get {key!r} |> {value!r}")
         else:
             value = None
@@ -192,7 +252,7 @@ class KvsClient:
         res = self._request(id, node, "get", "data")
         if not res.ok:
             raise KvsClientException(f"list failed: {res.status_code} {res.text}")
-        values = res.json()
+        values = json.loads(res.content)
         if not isinstance(values, dict):
             raise KvsClientException("list failed: expected a dict")
         log(f"client {self.name} [{id}] -> {node.name}: list |> [{len(values)} items]")
@@ -200,15 +260,27 @@ class KvsClient:
 
     def send_view(self, node: _NodeLike, view: Sequence[_NodeLike]) -> None:
         id = self._new_id()
+        key = tuple((f"{n.ip}:8081", n.index) for n in view)
+        if self._sent_views.get(node.name) == key:
+            log(f"client {self.name} [{id}] -> {node.name}: view (unchanged, skipped)")
+            return
         view_ = [dict(address=f"{n.ip}:8081", id=n.index) for n in view]
         log(
             f"client {self.name} [{id}] -> {node.name}: view {[f'{n.name} (addr={n.ip}:8081, id={n.index})' for n in view]}"
         )
-        res = self._request(id, node, "put", "view", json={"view": view_})
+        try:
+            res = self._request(id, node, "put", "view", json={"view": view_})
+        except Exception:
+            # the node may or may not have applied it
+            self._sent_views.pop(node.name, None)
+            raise
         if not res.ok:
+            self._sent_views.pop(node.name, None)
             raise KvsClientException(f"send_view failed: {res.status_code} {res.text}")
+        self._sent_views[node.name] = key
 
     def broadcast_view(self, nodes: Sequence[_NodeLike]) -> None:
         log(f"client {self.name}: broadcast view")
-        for node in nodes:
-            self.send_view(node, nodes)
+        # views are independent per node, so send them all at once; send_view skips the nodes
+        # that already hold this view
+        parallel_map(lambda node: self.send_view(node, nodes), nodes)
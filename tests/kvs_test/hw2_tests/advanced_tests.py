@@ -1,13 +1,33 @@
-from multiprocessing.pool import ThreadPool
-import time
+import base64
+import hashlib
+import itertools
 import random
-import string
+import time
 from threading import Thread
 
-from ..containers import ClusterConductor
-from ..hw2_api import KvsFixture
+from ..containers import ClusterConductor, ClusterNode
+from ..hw2_api import GetResponse, KvsClient, KvsFixture, PutResponse
 from ..testcase import TestCase
-from ..util import log
+from ..util import log, parallel_map
+
+# (name, key, value) probes for advanced_boundary_conditions
+BOUNDARY_CASES = (
+    ("empty value", "empty_value_key", ""),
+    ("special chars", "special!@#$%^&*()_+{}[]|;:'\",.<>?/~`", "value!@#$%^&*()_+{}[]|;:'\",.<>?/~`"),
+    ("long key", "a" * 1000, "long_key_value"),
+)
+
+
+def get_from_all(mc: KvsClient, nodes: list[ClusterNode], keys: list[str]) -> list[tuple[int, str, GetResponse]]:
+    """GET every key from every node concurrently, returning (node index, key, response) in node-major order"""
+    pairs = list(itertools.product(range(len(nodes)), keys))
+    responses = parallel_map(lambda pair: mc.get(nodes[pair[0]], pair[1]), pairs)
+    return [(i, key, r) for (i, key), r in zip(pairs, responses)]
+
+
+def put_all(mc: KvsClient, node: ClusterNode, values: dict[str, str]) -> list[PutResponse]:
+    """PUT every key/value pair to node concurrently, returning responses in dict order"""
+    return parallel_map(lambda kv: mc.put(node, kv[0], kv[1]), values.items())
 
 
 def advanced_concurrent_writes(conductor: ClusterConductor, fx: KvsFixture):
@@ -33,21 +53,21 @@ def advanced_concurrent_writes(conductor: ClusterConductor, fx: KvsFixture):
         return r.status_code
     
     # Run concurrent writes
-    with ThreadPool() as pool:
-        results = pool.map(write_key, range(5))
+    results = parallel_map(write_key, range(5), max_workers=8)
     
     for status in results:
         assert status in [200, 201], f"expected 200 or 201, got {status}"
     
-    # Verify all nodes have the same value after concurrent writes
-    values = []
-    for node in nodes:
+    # Verify all nodes have the same value after concurrent writes (strong consistency),
+    # stopping at the first node that disagrees with node 0
+    first_value = None
+    for i, node in enumerate(nodes):
         r = mc.get(node, "concurrent_key")
         assert r.status_code == 200, f"expected 200, got {r.status_code}"
-        values.append(r.value)
-    
-    # All nodes should have the same value (strong consistency)
-    assert len(set(values)) == 1, f"nodes have inconsistent values: {values}"
+        if i == 0:
+            first_value = r.value
+        else:
+            assert r.value == first_value, f"nodes have inconsistent values: node {i} has {r.value!r}, node 0 has {first_value!r}"
     
     return True, "ok"
 
@@ -64,19 +84,26 @@ def advanced_large_values(conductor: ClusterConductor, fx: KvsFixture):
     sizes = [1024, 10240, 102400]  # 1KB, 10KB, 100KB
     
     for size in sizes:
-        # Generate random string of specified size
-        large_value = ''.join(random.choices(string.ascii_letters + string.digits, k=size))
+        # Generate random string of specified size (base64 of random bytes, trimmed to length),
+        # seeded by size so a failing value can be regenerated
+        large_value = base64.b64encode(random.Random(size).randbytes((size + 3) // 4 * 3))[:size].decode("ascii")
         key = f"large_key_{size}"
         
         log(f"\n> TESTING {size} bytes value")
         r = mc.put(nodes[0], key, large_value)
         assert r.status_code == 201, f"expected 201 for new key, got {r.status_code}"
         
+        # only keep the digest around, and compare each node's copy against it
+        expected_digest = hashlib.sha256(large_value.encode()).digest()
+        del large_value
+        
         # Verify each node has the same large value
         for node in nodes:
             r = mc.get(node, key)
             assert r.status_code == 200, f"expected 200, got {r.status_code}"
-            assert r.value == large_value, f"value mismatch for {size} bytes"
+            assert r.value is not None, f"value missing for {size} bytes"
+            actual_digest = hashlib.sha256(r.value.encode()).digest()
+            assert actual_digest == expected_digest, f"value mismatch for {size} bytes ({len(r.value)} bytes returned)"
     
     return True, "ok"
 
@@ -90,9 +117,8 @@ def advanced_primary_failure_during_replication(conductor: ClusterConductor, fx:
     log("\n> TEST PRIMARY FAILURE DURING REPLICATION")
     
     # Add some initial data
-    test_keys = ["test1", "test2", "test3"]
-    for i, key in enumerate(test_keys):
-        r = mc.put(nodes[0], key, f"value{i}")
+    test_values = {key: f"value{i}" for i, key in enumerate(["test1", "test2", "test3"])}
+    for r in put_all(mc, nodes[0], test_values):
         assert r.status_code == 201, f"expected 201 for new key, got {r.status_code}"
     
     # Kill the primary (node 0) right after sending a new write
@@ -118,11 +144,11 @@ def advanced_primary_failure_during_replication(conductor: ClusterConductor, fx:
     mc.broadcast_view(new_view)
     
     # Verify previous data is still accessible from remaining nodes
-    for i, key in enumerate(test_keys):
+    for key, value in test_values.items():
         for node in new_view:
             r = mc.get(node, key)
             assert r.status_code == 200, f"expected 200, got {r.status_code}"
-            assert r.value == f"value{i}", f"expected value{i}, got {r.value}"
+            assert r.value == value, f"expected {value}, got {r.value}"
     
     # Write new data to new primary
     r = mc.put(nodes[1], "after_failure", "new_value")
@@ -152,17 +178,11 @@ def advanced_complex_partition(conductor: ClusterConductor, fx: KvsFixture):
     # Create three partitions: [0,1], [2,3], [4]
     log("\n> CREATING MULTIPLE PARTITIONS")
     
-    # Partition 1: nodes 0,1
-    conductor.create_partition([nodes[0], nodes[1]], "p1")
-    mc.broadcast_view([nodes[0], nodes[1]])
-    
-    # Partition 2: nodes 2,3
-    conductor.create_partition([nodes[2], nodes[3]], "p2")
-    mc.broadcast_view([nodes[2], nodes[3]])
-    
-    # Partition 3: node 4
-    conductor.create_partition([nodes[4]], "p3")
-    mc.broadcast_view([nodes[4]])
+    # Partition 1: nodes 0,1; Partition 2: nodes 2,3; Partition 3: node 4
+    partitions = {"p1": [nodes[0], nodes[1]], "p2": [nodes[2], nodes[3]], "p3": [nodes[4]]}
+    conductor.create_partitions(partitions)
+    for partition in partitions.values():
+        mc.broadcast_view(partition)
     
     # Describe the network topology
     conductor.describe_cluster()
@@ -233,13 +253,11 @@ def advanced_partition_healing(conductor: ClusterConductor, fx: KvsFixture):
     # Create two partitions: [0,1] and [2,3]
     log("\n> CREATING PARTITIONS")
     
-    # Partition 1: nodes 0,1
-    conductor.create_partition([nodes[0], nodes[1]], "p1")
-    mc.broadcast_view([nodes[0], nodes[1]])
-    
-    # Partition 2: nodes 2,3
-    conductor.create_partition([nodes[2], nodes[3]], "p2")
-    mc.broadcast_view([nodes[2], nodes[3]])
+    # Partition 1: nodes 0,1; Partition 2: nodes 2,3
+    partitions = {"p1": [nodes[0], nodes[1]], "p2": [nodes[2], nodes[3]]}
+    conductor.create_partitions(partitions)
+    for partition in partitions.values():
+        mc.broadcast_view(partition)
     
     # Write different data to each partition, including updates to the common key
     log("\n> WRITING TO DIFFERENT PARTITIONS")
@@ -257,32 +275,26 @@ def advanced_partition_healing(conductor: ClusterConductor, fx: KvsFixture):
     # Verify that all nodes can access all keys after healing
     log("\n> VERIFYING DATA AFTER HEALING")
     
-    # All nodes should see p1_key
-    for i, node in enumerate(nodes):
-        r = mc.get(node, "p1_key")
-        assert r.status_code == 200, f"node {i} expected 200 for p1_key, got {r.status_code}"
-        assert r.value == "p1_value", f"node {i} expected p1_value, got {r.value}"
-    
-    # All nodes should see p2_key
-    for i, node in enumerate(nodes):
-        r = mc.get(node, "p2_key")
-        assert r.status_code == 200, f"node {i} expected 200 for p2_key, got {r.status_code}"
-        assert r.value == "p2_value", f"node {i} expected p2_value, got {r.value}"
-    
-    # For the common_key, all nodes should have the same value after healing
-    # Which value prevails depends on implementation, but it must be consistent
-    values = []
-    for node in nodes:
-        r = mc.get(node, "common_key")
-        assert r.status_code == 200, f"expected 200 for common_key, got {r.status_code}"
-        values.append(r.value)
-    
-    # All nodes should have the same value (strong consistency after healing)
-    assert len(set(values)) == 1, f"nodes have inconsistent values after healing: {values}"
+    # All nodes should see p1_key and p2_key, and some value for common_key
+    expected_values = {"p1_key": "p1_value", "p2_key": "p2_value"}
+    common_value = None
+    for i, key, r in get_from_all(mc, nodes, [*expected_values, "common_key"]):
+        if key == "common_key":
+            # Which value prevails depends on implementation, but it must be consistent
+            # (strong consistency after healing), so every node must match the first one
+            assert r.status_code == 200, f"expected 200 for common_key, got {r.status_code}"
+            if common_value is None:
+                common_value = r.value
+            else:
+                assert r.value == common_value, (
+                    f"nodes have inconsistent values after healing: node {i} has {r.value!r}, expected {common_value!r}"
+                )
+            continue
+        assert r.status_code == 200, f"node {i} expected 200 for {key}, got {r.status_code}"
+        assert r.value == expected_values[key], f"node {i} expected {expected_values[key]}, got {r.value}"
     
     # The value should be either p1_updated_value or p2_updated_value
     # Which one depends on the implementation's conflict resolution strategy
-    common_value = values[0]
     assert common_value in ["p1_updated_value", "p2_updated_value"], f"unexpected value: {common_value}"
     
     return True, "ok"
@@ -301,17 +313,14 @@ def advanced_view_changes(conductor: ClusterConductor, fx: KvsFixture):
     
     # Add some data
     log("\n> ADDING INITIAL DATA")
-    keys = ["key1", "key2", "key3"]
-    for i, key in enumerate(keys):
-        r = mc.put(nodes[0], key, f"value{i}")
+    initial_values = {key: f"value{i}" for i, key in enumerate(["key1", "key2", "key3"])}
+    for r in put_all(mc, nodes[0], initial_values):
         assert r.status_code == 201, f"expected 201 for new key, got {r.status_code}"
     
     # Verify data is accessible from all nodes in the view
-    for node in initial_view:
-        for i, key in enumerate(keys):
-            r = mc.get(node, key)
-            assert r.status_code == 200, f"expected 200, got {r.status_code}"
-            assert r.value == f"value{i}", f"expected value{i}, got {r.value}"
+    for _, key, r in get_from_all(mc, initial_view, list(initial_values)):
+        assert r.status_code == 200, f"expected 200, got {r.status_code}"
+        assert r.value == initial_values[key], f"expected {initial_values[key]}, got {r.value}"
     
     # Change view: remove node 0 (primary), add node 3
     log("\n> CHANGING VIEW: REMOVE PRIMARY, ADD NEW NODE")
@@ -319,17 +328,14 @@ def advanced_view_changes(conductor: ClusterConductor, fx: KvsFixture):
     mc.broadcast_view(new_view)
     
     # Verify data is still accessible after view change
-    for node in new_view:
-        for i, key in enumerate(keys):
-            r = mc.get(node, key)
-            assert r.status_code == 200, f"expected 200, got {r.status_code}"
-            assert r.value == f"value{i}", f"expected value{i}, got {r.value}"
+    for _, key, r in get_from_all(mc, new_view, list(initial_values)):
+        assert r.status_code == 200, f"expected 200, got {r.status_code}"
+        assert r.value == initial_values[key], f"expected {initial_values[key]}, got {r.value}"
     
     # Add new data to the new view
     log("\n> ADDING DATA TO NEW VIEW")
-    new_keys = ["new_key1", "new_key2"]
-    for i, key in enumerate(new_keys):
-        r = mc.put(nodes[1], key, f"new_value{i}")
+    new_values = {key: f"new_value{i}" for i, key in enumerate(["new_key1", "new_key2"])}
+    for r in put_all(mc, nodes[1], new_values):
         assert r.ok, f"expected success, got {r.status_code}"
     
     # Change view again: keep only nodes 2, 3 and add node 4
@@ -337,19 +343,11 @@ def advanced_view_changes(conductor: ClusterConductor, fx: KvsFixture):
     final_view = [nodes[2], nodes[3], nodes[4]]
     mc.broadcast_view(final_view)
     
-    # Verify all data is still accessible
-    for node in final_view:
-        # Original data
-        for i, key in enumerate(keys):
-            r = mc.get(node, key)
-            assert r.status_code == 200, f"expected 200, got {r.status_code}"
-            assert r.value == f"value{i}", f"expected value{i}, got {r.value}"
-        
-        # Data added after first view change
-        for i, key in enumerate(new_keys):
-            r = mc.get(node, key)
-            assert r.status_code == 200, f"expected 200, got {r.status_code}"
-            assert r.value == f"new_value{i}", f"expected new_value{i}, got {r.value}"
+    # Verify all data is still accessible: original data, and data added after first view change
+    expected_values = initial_values | new_values
+    for _, key, r in get_from_all(mc, final_view, list(expected_values)):
+        assert r.status_code == 200, f"expected 200, got {r.status_code}"
+        assert r.value == expected_values[key], f"expected {expected_values[key]}, got {r.value}"
     
     # Verify node that was removed from view is not accepting requests
     # Node 0 should respond with 503 Service Unavailable
@@ -372,9 +370,8 @@ def advanced_node_recovery(conductor: ClusterConductor, fx: KvsFixture):
     log("\n> TEST NODE RECOVERY")
     
     # Add initial data
-    initial_keys = ["recovery_key1", "recovery_key2"]
-    for i, key in enumerate(initial_keys):
-        r = mc.put(nodes[0], key, f"recovery_value{i}")
+    initial_values = {key: f"recovery_value{i}" for i, key in enumerate(["recovery_key1", "recovery_key2"])}
+    for r in put_all(mc, nodes[0], initial_values):
         assert r.status_code == 201, f"expected 201 for new key, got {r.status_code}"
     
     # Kill node 1
@@ -396,18 +393,11 @@ def advanced_node_recovery(conductor: ClusterConductor, fx: KvsFixture):
     # Update view to include the revived node
     mc.broadcast_view(nodes)
     
-    # Verify all nodes can access all data
-    for node in nodes:
-        # Initial data
-        for i, key in enumerate(initial_keys):
-            r = mc.get(node, key)
-            assert r.status_code == 200, f"expected 200, got {r.status_code}"
-            assert r.value == f"recovery_value{i}", f"expected recovery_value{i}, got {r.value}"
-        
-        # Data added during failure
-        r = mc.get(node, "during_failure")
+    # Verify all nodes can access all data: initial data, and data added during failure
+    expected_values = initial_values | {"during_failure": "added_during_failure"}
+    for _, key, r in get_from_all(mc, nodes, list(expected_values)):
         assert r.status_code == 200, f"expected 200, got {r.status_code}"
-        assert r.value == "added_during_failure", f"expected added_during_failure, got {r.value}"
+        assert r.value == expected_values[key], f"expected {expected_values[key]}, got {r.value}"
     
     # Kill and revive the primary node (node 0)
     log("\n> KILLING AND REVIVING PRIMARY NODE")
@@ -428,8 +418,7 @@ def advanced_node_recovery(conductor: ClusterConductor, fx: KvsFixture):
     mc.broadcast_view(nodes)
     
     # Verify all data is accessible, including data added after primary failure
-    for node in nodes:
-        r = mc.get(node, "after_primary_failure")
+    for _, _, r in get_from_all(mc, nodes, ["after_primary_failure"]):
         assert r.status_code == 200, f"expected 200, got {r.status_code}"
         assert r.value == "new_primary_value", f"expected new_primary_value, got {r.value}"
     
@@ -444,36 +433,22 @@ def advanced_boundary_conditions(conductor: ClusterConductor, fx: KvsFixture):
     
     log("\n> TEST BOUNDARY CONDITIONS")
     
-    # Test with empty value
-    log("\n> TESTING EMPTY VALUE")
-    r = mc.put(nodes[0], "empty_value_key", "")
-    assert r.status_code == 201, f"expected 201 for empty value, got {r.status_code}"
-    
-    r = mc.get(nodes[0], "empty_value_key")
-    assert r.status_code == 200, f"expected 200 for empty value, got {r.status_code}"
-    assert r.value == "", f"expected empty string, got {r.value}"
-    
-    # Test with special characters in key and value
-    log("\n> TESTING SPECIAL CHARACTERS")
-    special_key = "special!@#$%^&*()_+{}[]|;:'\",.<>?/~`"
-    special_value = "value!@#$%^&*()_+{}[]|;:'\",.<>?/~`"
-    
-    r = mc.put(nodes[0], special_key, special_value)
-    assert r.status_code == 201, f"expected 201 for special chars, got {r.status_code}"
+    # NOTE: each probe reads back from the node it wrote to on purpose. A 201 only shows the
+    # PUT was accepted; the GET is what checks the store hands the odd value/key back intact.
     
-    r = mc.get(nodes[0], special_key)
-    assert r.status_code == 200, f"expected 200 for special chars, got {r.status_code}"
-    assert r.value == special_value, f"value mismatch for special chars"
+    # the probes touch disjoint keys, so they run concurrently
+    log("\n> TESTING EMPTY VALUE, SPECIAL CHARACTERS, LONG KEY")
     
-    # Test with very long key
-    log("\n> TESTING LONG KEY")
-    long_key = "a" * 1000  # 1000 character key
-    r = mc.put(nodes[0], long_key, "long_key_value")
-    assert r.status_code == 201, f"expected 201 for long key, got {r.status_code}"
+    def probe(case: tuple[str, str, str]):
+        name, key, value = case
+        r = mc.put(nodes[0], key, value)
+        assert r.status_code == 201, f"expected 201 for {name}, got {r.status_code}"
+        
+        r = mc.get(nodes[0], key)
+        assert r.status_code == 200, f"expected 200 for {name}, got {r.status_code}"
+        assert r.value == value, f"value mismatch for {name}: expected {value!r}, got {r.value!r}"
     
-    r = mc.get(nodes[0], long_key)
-    assert r.status_code == 200, f"expected 200 for long key, got {r.status_code}"
-    assert r.value == "long_key_value", f"expected long_key_value, got {r.value}"
+    parallel_map(probe, BOUNDARY_CASES)
     
     # Test race condition with rapid updates
     log("\n> TESTING RAPID UPDATES")
@@ -482,20 +457,42 @@ def advanced_boundary_conditions(conductor: ClusterConductor, fx: KvsFixture):
     assert r.status_code == 201, f"expected 201 for new key, got {r.status_code}"
     
     # Perform multiple rapid updates
-    num_updates = 10
-    for i in range(num_updates):
-        r = mc.put(nodes[0], race_key, f"update_{i}")
+    updates = [f"update_{i}" for i in range(10)]
+    for update in updates:
+        r = mc.put(nodes[0], race_key, update)
         assert r.status_code == 200, f"expected 200 for update, got {r.status_code}"
     
     # All nodes should have the final value
+    final_value = updates[-1]
     for node in nodes:
         r = mc.get(node, race_key)
         assert r.status_code == 200, f"expected 200, got {r.status_code}"
-        assert r.value == f"update_{num_updates-1}", f"expected update_{num_updates-1}, got {r.value}"
+        assert r.value == final_value, f"expected {final_value}, got {r.value}"
     
     return True, "ok"
 
 
+# number of requests performance_test keeps in flight at once
+PERF_CONCURRENCY = 32
+# accepted status codes for performance_test; GetResponse.ok is always True, so reads check the code
+_OK_CREATE = (200, 201)
+_OK_MIXED_READ = (200, 404)
+
+
+def _timed(op):
+    """Run op, returning its result and how long it took in nanoseconds"""
+    start = time.perf_counter_ns()
+    r = op()
+    return r, time.perf_counter_ns() - start
+
+
+def _latency_summary(latencies_ns: list[int]) -> str:
+    ordered = sorted(latencies_ns)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {p50 / 1e6:.1f} ms, p99 {p99 / 1e6:.1f} ms"
+
+
 def performance_test(conductor: ClusterConductor, fx: KvsFixture):
     """Test performance under load."""
     nodes = conductor.spawn_cluster(node_count=3)
@@ -504,51 +501,70 @@ def performance_test(conductor: ClusterConductor, fx: KvsFixture):
     
     log("\n> PERFORMANCE TEST")
     
-    # Test throughput: multiple writes in sequence
+    # Test throughput: concurrent writes
     log("\n> TESTING WRITE THROUGHPUT")
     num_writes = 50
-    start_time = time.time()
+    concurrency = min(PERF_CONCURRENCY, num_writes)
+    # build keys/values up front so string formatting stays out of the timed window
+    perf_keys = [f"perf_key_{i}" for i in range(num_writes)]
+    perf_values = [f"perf_value_{i}" for i in range(num_writes)]
+    start_ns = time.perf_counter_ns()
     
-    for i in range(num_writes):
-        key = f"perf_key_{i}"
-        value = f"perf_value_{i}"
-        r = mc.put(nodes[0], key, value)
-        assert r.ok, f"expected success for write {i}, got {r.status_code}"
+    def write(i):
+        return _timed(lambda: mc.put(nodes[0], perf_keys[i], perf_values[i]))
+    
+    results = parallel_map(write, range(num_writes), max_workers=concurrency)
+    write_duration = (time.perf_counter_ns() - start_ns) / 1e9
+    for i, (r, _) in enumerate(results):
+        assert r.status_code in _OK_CREATE, f"expected success for write {i}, got {r.status_code}"
     
-    write_duration = time.time() - start_time
     write_throughput = num_writes / write_duration
     log(f"Write throughput: {write_throughput:.2f} ops/sec ({num_writes} ops in {write_duration:.2f} sec)")
+    log(f"Write latency: {_latency_summary([t for _, t in results])}")
     
     # Test read throughput
     log("\n> TESTING READ THROUGHPUT")
     num_reads = 100
-    start_time = time.time()
+    concurrency = min(PERF_CONCURRENCY, num_reads)
+    start_ns = time.perf_counter_ns()
     
-    for i in range(num_reads):
-        key = f"perf_key_{i % num_writes}"  # Cycle through keys we've written
-        r = mc.get(nodes[i % len(nodes)], key)  # Distribute reads across nodes
-        assert r.ok, f"expected success for read {i}, got {r.status_code}"
+    def read(i):
+        key = perf_keys[i % num_writes]  # Cycle through keys we've written
+        return _timed(lambda: mc.get(nodes[i % len(nodes)], key))  # Distribute reads across nodes
+    
+    results = parallel_map(read, range(num_reads), max_workers=concurrency)
+    read_duration = (time.perf_counter_ns() - start_ns) / 1e9
+    for i, (r, _) in enumerate(results):
+        assert r.status_code < 400, f"expected success for read {i}, got {r.status_code}"
     
-    read_duration = time.time() - start_time
     read_throughput = num_reads / read_duration
     log(f"Read throughput: {read_throughput:.2f} ops/sec ({num_reads} ops in {read_duration:.2f} sec)")
+    log(f"Read latency: {_latency_summary([t for _, t in results])}")
     
     # Test mixed workload
     log("\n> TESTING MIXED WORKLOAD")
     num_ops = 100
-    start_time = time.time()
+    concurrency = min(PERF_CONCURRENCY, num_ops)
+    mixed_keys = [f"mixed_key_{i}" for i in range(20)]  # Use 20 different keys
+    mixed_values = [f"mixed_value_{i}" for i in range(num_ops)]
+    start_ns = time.perf_counter_ns()
     
-    for i in range(num_ops):
-        key = f"mixed_key_{i % 20}"  # Use 20 different keys
+    def mixed(i):
+        key = mixed_keys[i % len(mixed_keys)]
         if i % 3 == 0:  # 1/3 writes, 2/3 reads
-            r = mc.put(nodes[0], key, f"mixed_value_{i}")
-        else:
-            r = mc.get(nodes[i % len(nodes)], key)
-        assert r.ok if i % 3 != 0 or i >= 20 else r.status_code in [200, 201], f"operation {i} failed"
+            return _timed(lambda: mc.put(nodes[0], key, mixed_values[i]))
+        return _timed(lambda: mc.get(nodes[i % len(nodes)], key))
+    
+    results = parallel_map(mixed, range(num_ops), max_workers=concurrency)
+    mixed_duration = (time.perf_counter_ns() - start_ns) / 1e9
+    for i, (r, _) in enumerate(results):
+        # reads may race ahead of the first write to their key
+        expected = _OK_CREATE if i % 3 == 0 else _OK_MIXED_READ
+        assert r.status_code in expected, f"operation {i} failed with {r.status_code}"
     
-    mixed_duration = time.time() - start_time
     mixed_throughput = num_ops / mixed_duration
     log(f"Mixed throughput: {mixed_throughput:.2f} ops/sec ({num_ops} ops in {mixed_duration:.2f} sec)")
+    log(f"Mixed latency: {_latency_summary([t for _, t in results])}")
     
     return True, "Throughput tests completed successfully"
 
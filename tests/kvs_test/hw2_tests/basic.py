@@ -1,9 +1,11 @@
-from multiprocessing.pool import ThreadPool
-
 from ..containers import ClusterConductor
 from ..hw2_api import KvsFixture
 from ..testcase import TestCase
-from ..util import log
+from ..util import log, parallel_map
+
+# keys and values written by kvs_put_delete, one per node
+PUT_DELETE_KEYS = ("test1", "test2", "test3", "test4")
+PUT_DELETE_VALUES = ("1", "2", "3", "4")
 
 
 def basic_kvs_put_get_1(conductor: ClusterConductor, fx: KvsFixture):
@@ -27,7 +29,7 @@ def basic_kvs_put_get_1(conductor: ClusterConductor, fx: KvsFixture):
     r = mc.put(a, "test1", "world")
     assert r.status_code == 200, f"expected 200 for update, got {r.status_code}"
 
-    # verify update worked
+    # verify update worked (the 200 above only says the PUT was accepted)
     r = mc.get(a, "test1")
     assert r.value == "world", "update failed"
 
@@ -159,11 +161,9 @@ def kvs_put_delete(conductor: ClusterConductor, fx: KvsFixture):
     nodes = conductor.spawn_cluster(node_count=4)
     mc = fx.create_client(name="tester")
     mc.broadcast_view(nodes)
-    testkeys = ["test1", "test2", "test3", "test4"]
-    values = [1, 2, 3, 4]
     log("\n> PUT NEW KEY")
-    for node, key, value in zip(nodes, testkeys, values):
-        r = mc.put(node, key, str(value))
+    writes = list(zip(nodes, PUT_DELETE_KEYS, PUT_DELETE_VALUES))
+    for r in parallel_map(lambda w: mc.put(*w), writes):
         assert r.status_code == 201, f"expected 201 for new key, got {r.status_code}"
 
     log("\n>DELETE FROM BACKUP")
@@ -175,11 +175,11 @@ def kvs_put_delete(conductor: ClusterConductor, fx: KvsFixture):
     mc.broadcast_view(nodes[:2])
     mc.broadcast_view(nodes[2:])
 
-    for key in testkeys[1:]:
-        r = mc.delete(nodes[1], key)
-        assert r.status_code == 200, f"p0: expected 200 for ok, got {r.status_code}"
-        r = mc.delete(nodes[3], key)
-        assert r.status_code == 200, f"p1: expected 200 for ok, got {r.status_code}"
+    # the partitions are independent, and so are the keys within each
+    deletes = [(side, node, key) for key in PUT_DELETE_KEYS[1:] for side, node in (("p0", nodes[1]), ("p1", nodes[3]))]
+    results = parallel_map(lambda d: mc.delete(d[1], d[2]), deletes)
+    for (side, _, _), r in zip(deletes, results):
+        assert r.status_code == 200, f"{side}: expected 200 for ok, got {r.status_code}"
     r = mc.get_all(nodes[1])
     assert r.status_code == 200, f"p0: get_all expected 200 for ok, got {r.status_code}"
     assert len(r.values) == 0, "p0: expected empty dictionary"
@@ -206,8 +206,9 @@ def kvs_kill_node_1(conductor: ClusterConductor, fx: KvsFixture):
     # Kill one node
     conductor.simulate_kill_node(nodes[3], conductor.base_net)
     log("> put while node is dead (should timeout)")
-    with ThreadPool() as pool:
-        results = pool.map(lambda it: client.put(it[1], f"key-{it[0]}", f"value-{it[0]}"), enumerate(nodes[:3]))
+    results = parallel_map(
+        lambda it: client.put(it[1], f"key-{it[0]}", f"value-{it[0]}"), enumerate(nodes[:3]), max_workers=8
+    )
     for r in results:
         assert r.status_code == 408, f"expected timeout, got {r.status_code}"
 
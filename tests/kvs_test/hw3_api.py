@@ -1,13 +1,35 @@
 # hw3_api.py
+import itertools
 import json
+import os
+import random
 import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol, Sequence, Dict, Any, Optional
 
 import requests
+import requests.adapters
 
-from .util import log
+from .util import log, parallel_map, poll_until
+
+# nodes are reached through localhost port mappings, so connecting should be near-instant;
+# a connect that stalls is retried with backoff instead of waiting out the full request timeout
+CONNECT_TIMEOUT = 1.0
+
+# set KVS_LOG_HTTP_BODIES=0 to leave response bodies out of the client logs
+LOG_HTTP_BODIES = os.environ.get("KVS_LOG_HTTP_BODIES") != "0"
+
+def _decode_body(body: bytes) -> str:
+    return body.decode("utf-8", errors="replace")
+
+def _json_object(content: bytes) -> Optional[Dict[str, Any]]:
+    """The JSON object in a response body, or None if the body isn't one"""
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
 
 class _NodeLike(Protocol):
     name: str
@@ -26,88 +48,138 @@ class KvsTimeout(Exception):
 class CreateClient(Protocol):
     def __call__(self, name: str) -> "KvsClient": ...
 
+# stands in for the response of any request that timed out; never mutated, so it's shared
+_TIMEOUT_RESPONSE = requests.Response()
+_TIMEOUT_RESPONSE.status_code = 408
+_TIMEOUT_RESPONSE._content = b""
+
+def new_session() -> requests.Session:
+    """Create a session that keeps connections to each node alive; safe to share between threads"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=0)
+    session.mount("http://", adapter)
+    return session
+
 class KvsFixture:
     def __init__(self):
         self.clients: list[KvsClient] = []
+        # all clients share one connection pool, so concurrent clients reuse each other's connections
+        self.session = new_session()
+        # last view each node accepted, from any client in this test; only accurate as long as every
+        # view PUT goes through a client, so tests never send views on the session directly
+        self.sent_views: dict[str, tuple] = {}
 
     def create_client(self, name: str) -> "KvsClient":
-        client = KvsClient(name=name)
+        client = KvsClient(name=name, session=self.session, sent_views=self.sent_views)
         self.clients.append(client)
         return client
 
+    def close(self) -> None:
+        self.session.close()
+
 class KvsClient:
-    def __init__(self, name: str, timeout: int = 10, num_retries: int = 3):
+    def __init__(
+        self,
+        name: str,
+        timeout: int = 10,
+        num_retries: int = 5,
+        retry_backoff: float = 0.05,
+        session: Optional[requests.Session] = None,
+        sent_views: Optional[dict[str, tuple]] = None,
+    ):
         self.name = name
         self.timeout = timeout
         self.num_retries = num_retries
+        self.retry_backoff = retry_backoff
         self.causal_metadata = {}
+        # reuse keep-alive connections to each node instead of reconnecting per request
+        self._owns_session = session is None
+        self._session = session if session is not None else new_session()
+        # shared with the other clients of a fixture, so a view sent by one isn't skipped by another
+        self._sent_views = sent_views if sent_views is not None else {}
+        # base url per node port, built once instead of on every request
+        self._base_urls: dict[int, str] = {}
         self._log = []
-        self._id = 0
+        # next() on a count is atomic, so ids stay unique when requests are sent from several threads
+        self._ids = itertools.count()
+
+    def close(self) -> None:
+        # a shared session belongs to the fixture that created it
+        if self._owns_session:
+            self._session.close()
 
     def _new_id(self) -> int:
-        id = self._id
-        self._id += 1
-        return id
+        return next(self._ids)
 
     def dump_logs(self, path: Path) -> None:
         """Dump the logs to a file"""
         path.mkdir(parents=True, exist_ok=True)
-        with (path / f"{self.name}.jsonl").open("w") as f:
-            for item in self._log:
-                json.dump(item, f)
-                f.write("\n")
+        # encode everything up front and write it in one go, using compact separators
+        # response bodies are the only bytes in an entry; decode them on the way out
+        lines = [json.dumps(item, separators=(",", ":"), default=_decode_body) + "\n" for item in self._log]
+        (path / f"{self.name}.jsonl").write_text("".join(lines), encoding="utf-8")
 
     def _base_url(self, node: _NodeLike) -> str:
-        return f"http://localhost:{node.external_port}"
+        url = self._base_urls.get(node.external_port)
+        if url is None:
+            url = self._base_urls[node.external_port] = f"http://localhost:{node.external_port}/"
+        return url
 
-    def _request(self, corr_id: int, node: _NodeLike, method: str, path: str, **kwargs) -> requests.Response:
+    def _request(
+        self, corr_id: int, node: _NodeLike, method: str, path: str, adopt_metadata: bool = True, **kwargs
+    ) -> tuple[requests.Response, Optional[Dict[str, Any]]]:
         # send request, but handle some exceptions
-        url = f"{self._base_url(node)}/{path.lstrip('/')}"
+        # returns the response and, for an ok response, its JSON object body (None if it had none)
+        # requests sent in parallel pass adopt_metadata=False and leave causal_metadata to their caller
+        # paths are always relative ("ping", "data/<key>", "view")
+        url = self._base_url(node) + path
         response = None
         timed_out = False
         
-        # Add causal metadata to the request body if it exists
-        if 'json' in kwargs and self.causal_metadata:
-            kwargs['json']['causal-metadata'] = self.causal_metadata
-        elif method != 'DELETE':  # DELETE doesn't have a body
-            if 'json' not in kwargs:
-                kwargs['json'] = {}
-            kwargs['json']['causal-metadata'] = self.causal_metadata
+        # every request carries the client's causal metadata; build a new payload instead of
+        # writing into the caller's dict, and encode it once so retries resend the same bytes
+        payload = {**kwargs.pop('json', {}), 'causal-metadata': self.causal_metadata}
+        kwargs['data'] = json.dumps(payload, separators=(",", ":")).encode()
+        kwargs['headers'] = {**kwargs.get('headers', {}), 'Content-Type': 'application/json'}
 
         try:
             for i in range(self.num_retries):
                 try:
-                    response = getattr(requests, method)(url, timeout=self.timeout, **kwargs)
+                    response = self._session.request(
+                        method.upper(), url, timeout=(CONNECT_TIMEOUT, self.timeout), **kwargs
+                    )
                     if response.status_code == 500:
-                        return response
+                        return response, None
                     break
                 except requests.exceptions.ConnectionError:
                     if i == self.num_retries - 1:
                         raise
-                    time.sleep(0.5)  # Short delay before retry
+                    # back off exponentially (capped at 0.5s), with jitter so concurrent clients don't retry in lockstep
+                    time.sleep(min(self.retry_backoff * 2**i, 0.5) + random.uniform(0, self.retry_backoff / 2))
             
             if response is None:
                 raise KvsClientException(f"failed to connect after {self.num_retries} attempts")
 
+            # parse an ok body once and hand it back with the response
+            body = _json_object(response.content) if response.ok else None
             # Update causal metadata from response if available
-            if response.ok and 'causal-metadata' in response.json():
-                self.causal_metadata = response.json()['causal-metadata']
+            if adopt_metadata and body is not None and 'causal-metadata' in body:
+                self.causal_metadata = body['causal-metadata']
 
-            return response
+            return response, body
             
         except requests.exceptions.Timeout:
             timed_out = True
-            res = requests.Response()
-            res.status_code = 408
-            return res
+            return _TIMEOUT_RESPONSE, None
         finally:
             log_entry = {
                 "id": corr_id,
                 "url": url,
                 "method": method,
-                "payload": kwargs.get("json"),
+                "payload": payload,
                 "status_code": response.status_code if response is not None else None,
-                "response_text": response.text if response is not None else None,
+                # raw body bytes, only decoded when the log is dumped
+                "response_text": response.content if response is not None and LOG_HTTP_BODIES else None,
                 "timed_out": timed_out
             }
             self._log.append(log_entry)
@@ -117,7 +189,7 @@ class KvsClient:
         id = self._new_id()
         log(f"client {self.name} [{id}] -> {node.name}: ping")
         try:
-            res = self._request(id, node, "get", "ping")
+            res, _ = self._request(id, node, "get", "ping")
             return res.status_code == 200
         except Exception:
             return False
@@ -129,7 +201,7 @@ class KvsClient:
         if len(key) == 0:
             raise ValueError("key cannot be empty")
         
-        res = self._request(id, node, "put", f"data/{key}", json={"value": value})
+        res, body = self._request(id, node, "put", f"data/{key}", json={"value": value})
         
         response_data = {
             "status_code": res.status_code,
@@ -137,18 +209,21 @@ class KvsClient:
         }
         
         if res.ok:
-            response_data["causal_metadata"] = res.json().get("causal-metadata", {})
+            response_data["causal_metadata"] = (body or {}).get("causal-metadata", {})
         
         return response_data
 
     def get(self, node: _NodeLike, key: str) -> Dict[str, Any]:
         """Get a value for a key from the store and return response data"""
+        return self._get(node, key)
+
+    def _get(self, node: _NodeLike, key: str, adopt_metadata: bool = True) -> Dict[str, Any]:
         id = self._new_id()
         log(f"client {self.name} [{id}] -> {node.name}: get {key!r}")
         if len(key) == 0:
             raise ValueError("key cannot be empty")
         
-        res = self._request(id, node, "get", f"data/{key}", json={})
+        res, body = self._request(id, node, "get", f"data/{key}", adopt_metadata=adopt_metadata, json={})
         
         response_data = {
             "status_code": res.status_code,
@@ -157,7 +232,7 @@ class KvsClient:
         }
         
         if res.ok:
-            data = res.json()
+            data = body or {}
             response_data["value"] = data.get("value")
             response_data["causal_metadata"] = data.get("causal-metadata", {})
             log(f"client {self.name} [{id}] -> {node.name}: get {key!r} |> {response_data['value']!r}")
@@ -169,7 +244,7 @@ class KvsClient:
         id = self._new_id()
         log(f"client {self.name} [{id}] -> {node.name}: list")
         
-        res = self._request(id, node, "get", "data", json={})
+        res, body = self._request(id, node, "get", "data", json={})
         
         response_data = {
             "status_code": res.status_code,
@@ -178,31 +253,85 @@ class KvsClient:
         }
         
         if res.ok:
-            data = res.json()
+            data = body or {}
             response_data["values"] = data.get("items", {})
             response_data["causal_metadata"] = data.get("causal-metadata", {})
             log(f"client {self.name} [{id}] -> {node.name}: list |> [{len(response_data['values'])} items]")
         
         return response_data
 
-    def send_view(self, node: _NodeLike, view: Sequence[_NodeLike]) -> bool:
-        """Send a view update to a node"""
-        id = self._new_id()
+    def get_many(self, pairs: Sequence[tuple[_NodeLike, str]]) -> list[Dict[str, Any]]:
+        """Get every (node, key) pair concurrently and return the responses in the same order"""
+        # which read finishes last depends on thread timing, so the reads leave causal_metadata alone
+        # and the client adopts it from the last ok response in request order instead
+        responses = parallel_map(lambda pair: self._get(pair[0], pair[1], adopt_metadata=False), pairs)
+        for r in reversed(responses):
+            if r["ok"] and r["causal_metadata"]:
+                self.causal_metadata = r["causal_metadata"]
+                break
+        return responses
+
+    @staticmethod
+    def _prepare_view(view: Sequence[_NodeLike]) -> tuple[list[dict], str]:
+        # the request body and its log description, built once per view
         view_ = [dict(address=f"{n.ip}:8081", id=n.index) for n in view]
-        log(f"client {self.name} [{id}] -> {node.name}: view {[f'{n.name} (addr={n.ip}:8081, id={n.index})' for n in view]}")
-        
-        res = self._request(id, node, "put", "view", json={"view": view_})
+        description = str([f"{n.name} (addr={n.ip}:8081, id={n.index})" for n in view])
+        return view_, description
+
+    def _send_prepared_view(self, node: _NodeLike, view_: list[dict], description: str) -> bool:
+        id = self._new_id()
+        key = tuple((v["address"], v["id"]) for v in view_)
+        if self._sent_views.get(node.name) == key:
+            log(f"client {self.name} [{id}] -> {node.name}: view (unchanged, skipped)")
+            return True
+        log(f"client {self.name} [{id}] -> {node.name}: view {description}")
+
+        try:
+            res, _ = self._request(id, node, "put", "view", json={"view": view_})
+        except Exception:
+            # the node may or may not have applied it
+            self._sent_views.pop(node.name, None)
+            raise
+        if res.ok:
+            self._sent_views[node.name] = key
+        else:
+            # the node may or may not have applied it
+            self._sent_views.pop(node.name, None)
         return res.ok
 
+    def send_view(self, node: _NodeLike, view: Sequence[_NodeLike]) -> bool:
+        """Send a view update to a node"""
+        return self._send_prepared_view(node, *self._prepare_view(view))
+
     def broadcast_view(self, nodes: Sequence[_NodeLike]) -> bool:
         """Broadcast a view update to all nodes"""
         log(f"client {self.name}: broadcast view")
-        success = True
-        for node in nodes:
-            if not self.send_view(node, nodes):
-                success = False
-        return success
+        view_, description = self._prepare_view(nodes)
+        # views are independent per node, so send them all at once
+        return all(parallel_map(lambda node: self._send_prepared_view(node, view_, description), nodes))
     
     def reset_causal_metadata(self):
         """Reset the client's causal metadata to empty"""
-        self.causal_metadata = {}
\ No newline at end of file
+        self.causal_metadata = {}
+
+    def wait_until_converged(self, nodes: Sequence[_NodeLike], key: str, timeout: float = 10.0) -> list:
+        """Poll key on every node until they all answer with one value; returns the values that were read last"""
+        def read_all():
+            return self.get_many([(node, key) for node in nodes])
+
+        def converged(responses):
+            # every node ok and agreeing with the first, stopping at the first one that doesn't
+            first = responses[0]["value"]
+            return first is not None and all(r["ok"] and r["value"] == first for r in responses)
+
+        responses = poll_until(read_all, converged, timeout=timeout, initial_delay=0.1)
+        return [r["value"] for r in responses if r["ok"]]
+
+    def wait_until_visible(self, nodes: Sequence[_NodeLike], expected: Dict[str, str], timeout: float = 10.0) -> bool:
+        """Poll until every node returns the expected value for every key; returns whether they all did"""
+        pairs = [(node, key) for node in nodes for key in expected]
+
+        def visible(responses):
+            return all(r["ok"] and r["value"] == expected[key] for (_, key), r in zip(pairs, responses))
+
+        return visible(poll_until(lambda: self.get_many(pairs), visible, timeout=timeout, initial_delay=0.1))
\ No newline at end of file
@@ -1,9 +1,8 @@
 # basic_tests.py
-import time
 from ..containers import ClusterConductor
 from ..hw3_api import KvsFixture
 from ..testcase import TestCase
-from ..util import log
+from ..util import log, poll_until
 
 def basic_put_get_with_metadata(conductor: ClusterConductor, fx: KvsFixture):
     """Test basic put and get operations with causal metadata."""
@@ -67,9 +66,9 @@ def basic_availability(conductor: ClusterConductor, fx: KvsFixture):
     put_response = client.put(nodes[0], "avail_key", "avail_value")
     assert put_response["ok"], f"PUT failed with status code {put_response['status_code']}"
     
-    # Try to get the value from all nodes
-    for i, node in enumerate(nodes):
-        get_response = client.get(node, "avail_key")
+    # Try to get the value from all nodes; each read only depends on the put, so they go out together
+    get_responses = client.get_many([(node, "avail_key") for node in nodes])
+    for i, get_response in enumerate(get_responses):
         assert get_response["ok"], f"GET from node {i} failed with status code {get_response['status_code']}"
         assert get_response["value"] == "avail_value", \
             f"Expected 'avail_value' from node {i}, got '{get_response['value']}'"
@@ -118,12 +117,7 @@ def multiple_clients_causal_metadata(conductor: ClusterConductor, fx: KvsFixture
     
     # Client 2 tries to get the value (should get value2 eventually)
     # might need to retry a few times due to anti-entropy process
-    max_retries = 10
-    for i in range(max_retries):
-        get_response = client2.get(nodes[0], "shared_key")
-        if get_response["value"] == "value2":
-            break
-        time.sleep(0.5)  # Wait for anti-entropy
+    get_response = poll_until(lambda: client2.get(nodes[0], "shared_key"), lambda r: r["value"] == "value2")
     
     assert get_response["value"] == "value2", \
         f"Client 2 expected 'value2', got '{get_response['value']}'"
@@ -132,11 +126,7 @@ def multiple_clients_causal_metadata(conductor: ClusterConductor, fx: KvsFixture
     client2.put(nodes[1], "shared_key", "value3")
     
     # Client 1 should see the update eventually
-    for i in range(max_retries):
-        get_response = client1.get(nodes[2], "shared_key")
-        if get_response["value"] == "value3":
-            break
-        time.sleep(0.5)  # Wait for anti-entropy
+    get_response = poll_until(lambda: client1.get(nodes[2], "shared_key"), lambda r: r["value"] == "value3")
     
     assert get_response["value"] == "value3", \
         f"Client 1 expected 'value3', got '{get_response['value']}'"
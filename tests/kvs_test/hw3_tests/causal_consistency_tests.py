@@ -1,9 +1,8 @@
 # causal_consistency_tests.py
-import time
 from ..containers import ClusterConductor
 from ..hw3_api import KvsFixture
 from ..testcase import TestCase
-from ..util import log
+from ..util import log, poll_until
 
 def test_write_read_causality(conductor: ClusterConductor, fx: KvsFixture):
     """Test write-read causality: if client writes A then reads A, it should see its write."""
@@ -118,18 +117,11 @@ def test_concurrent_writes(conductor: ClusterConductor, fx: KvsFixture):
     client1.put(nodes[0], "concurrent_key", "value_from_client1")
     client2.put(nodes[1], "concurrent_key", "value_from_client2")
     
-    # Allow time for anti-entropy
-    time.sleep(2)
-    
-    # Check that all nodes have converged to the same value
-    values = []
-    for node in nodes:
-        response = client1.get(node, "concurrent_key")
-        if response["ok"]:
-            values.append(response["value"])
+    # Poll until anti-entropy has every node answering with the same value
+    values = client1.wait_until_converged(nodes, "concurrent_key")
     
     # All nodes should have the same value
-    assert len(set(values)) == 1, f"Nodes have not converged: {values}"
+    assert values and all(v == values[0] for v in values), f"Nodes have not converged: {values}"
     
     # The value should be one of the two writes
     assert values[0] in ["value_from_client1", "value_from_client2"], \
@@ -155,11 +147,8 @@ def test_causal_visibility(conductor: ClusterConductor, fx: KvsFixture):
     client1.put(nodes[1], "key2", "value2")
     
     # Client2 reads key2
-    for _ in range(10):  # Retry with delay to account for anti-entropy
-        response = client2.get(nodes[2], "key2")
-        if response["ok"] and response["value"] == "value2":
-            break
-        time.sleep(0.5)
+    # Retry with backoff to account for anti-entropy
+    response = poll_until(lambda: client2.get(nodes[2], "key2"), lambda r: r["ok"] and r["value"] == "value2")
     
     assert response["value"] == "value2", f"Client2 should see key2=value2, got {response['value']}"
     
@@ -1,5 +1,4 @@
 # eventual_consistency_tests.py
-import time
 from ..containers import ClusterConductor
 from ..hw3_api import KvsFixture
 from ..testcase import TestCase
@@ -45,17 +44,10 @@ def test_partition_healing_convergence(conductor: ClusterConductor, fx: KvsFixtu
     healed_client.broadcast_view(nodes)
     
     # Wait for convergence (10 seconds as per spec)
-    time.sleep(10)
-    
-    # Check that all nodes have converged to the same value
-    values = []
-    for node in nodes:
-        response = healed_client.get(node, "shared_key")
-        if response["ok"]:
-            values.append(response["value"])
+    values = healed_client.wait_until_converged(nodes, "shared_key")
     
     # All nodes should have the same value
-    assert len(set(values)) == 1, f"Nodes have not converged: {values}"
+    assert values and all(v == values[0] for v in values), f"Nodes have not converged: {values}"
     
     # The value should be one of the two partition values
     assert values[0] in ["p1_value", "p2_value"], \
@@ -78,21 +70,14 @@ def test_multiple_concurrent_updates(conductor: ClusterConductor, fx: KvsFixture
     for i, client in enumerate(clients):
         client.put(nodes[i], "concurrent_key", f"value_from_client{i}")
     
-    # Wait for convergence
-    time.sleep(10)
-    
-    # Check that all nodes have converged to the same value
+    # Wait for convergence, checking that all nodes end up with the same value
     check_client = fx.create_client("check_client")
     check_client.broadcast_view(nodes)
     
-    values = []
-    for node in nodes:
-        response = check_client.get(node, "concurrent_key")
-        if response["ok"]:
-            values.append(response["value"])
+    values = check_client.wait_until_converged(nodes, "concurrent_key")
     
     # All nodes should have the same value
-    assert len(set(values)) == 1, f"Nodes have not converged: {values}"
+    assert values and all(v == values[0] for v in values), f"Nodes have not converged: {values}"
     
     # The value should be one of the five client values
     expected_values = [f"value_from_client{i}" for i in range(5)]
@@ -121,10 +106,11 @@ def test_node_joining_after_partition(conductor: ClusterConductor, fx: KvsFixtur
     new_view_client.broadcast_view(nodes)
     
     # Wait for the new node to catch up
-    time.sleep(10)
+    expected_values = {"key1": "value1", "key2": "value2", "key3": "value3"}
+    new_view_client.wait_until_visible([nodes[3]], expected_values)
     
     # The new node should have all the data
-    for key, expected in [("key1", "value1"), ("key2", "value2"), ("key3", "value3")]:
+    for key, expected in expected_values.items():
         response = new_view_client.get(nodes[3], key)
         assert response["ok"], f"GET for {key} failed with status {response['status_code']}"
         assert response["value"] == expected, \
@@ -166,7 +152,7 @@ def test_repeated_partition_and_healing(conductor: ClusterConductor, fx: KvsFixt
     healed1_client.broadcast_view(nodes)
     
     # Wait for convergence
-    time.sleep(10)
+    healed1_client.wait_until_converged(nodes, "shared_key")
     
     # Scenario 2: Create new partitions [0,2,4] and [1,3,5]
     conductor.create_partition([nodes[0], nodes[2], nodes[4]], "p2a")
@@ -193,18 +179,11 @@ def test_repeated_partition_and_healing(conductor: ClusterConductor, fx: KvsFixt
     healed2_client = fx.create_client(name="healed2_client")
     healed2_client.broadcast_view(nodes)
     
-    # Wait for convergence
-    time.sleep(10)
-    
-    # Check that all nodes have converged to the same value
-    values = []
-    for node in nodes:
-        response = healed2_client.get(node, "shared_key")
-        if response["ok"]:
-            values.append(response["value"])
+    # Wait for convergence, checking that all nodes end up with the same value
+    values = healed2_client.wait_until_converged(nodes, "shared_key")
     
     # All nodes should have the same value
-    assert len(set(values)) == 1, f"Nodes have not converged: {values}"
+    assert values and all(v == values[0] for v in values), f"Nodes have not converged: {values}"
     
     # The value should be one of the expected values
     expected_values = ["p1a_value", "p1b_value", "p2a_value", "p2b_value"]
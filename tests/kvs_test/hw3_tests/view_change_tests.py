@@ -1,5 +1,4 @@
 # view_change_tests.py
-import time
 from ..containers import ClusterConductor
 from ..hw3_api import KvsFixture
 from ..testcase import TestCase
@@ -26,11 +25,12 @@ def test_add_node(conductor: ClusterConductor, fx: KvsFixture):
     new_client.broadcast_view(new_view)
     
     # Wait for the new node to catch up
-    time.sleep(10)
+    expected_values = {"key1": "value1", "key2": "value2"}
+    new_client.wait_until_visible([nodes[3]], expected_values)
     
     # The new node should have all the data
-    for key, expected in [("key1", "value1"), ("key2", "value2")]:
-        response = new_client.get(nodes[3], key)
+    responses = new_client.get_many([(nodes[3], key) for key in expected_values])
+    for (key, expected), response in zip(expected_values.items(), responses):
         assert response["ok"], f"GET for {key} failed with status {response['status_code']}"
         assert response["value"] == expected, \
             f"Expected '{expected}' for {key}, got '{response['value']}'"
@@ -39,8 +39,8 @@ def test_add_node(conductor: ClusterConductor, fx: KvsFixture):
     new_client.put(nodes[3], "key3", "value3")
     
     # Other nodes should see the new data
-    for i in range(3):
-        response = new_client.get(nodes[i], "key3")
+    responses = new_client.get_many([(node, "key3") for node in nodes[0:3]])
+    for i, response in enumerate(responses):
         assert response["ok"], f"GET from node {i} failed with status {response['status_code']}"
         assert response["value"] == "value3", \
             f"Expected 'value3' from node {i}, got '{response['value']}'"
@@ -74,8 +74,8 @@ def test_remove_node(conductor: ClusterConductor, fx: KvsFixture):
     # Other nodes should still work
     reduced_client.put(nodes[0], "key2", "value2")
     
-    for i in range(3):
-        response = reduced_client.get(nodes[i], "key2")
+    responses = reduced_client.get_many([(node, "key2") for node in reduced_view])
+    for i, response in enumerate(responses):
         assert response["ok"], f"GET from node {i} failed with status {response['status_code']}"
         assert response["value"] == "value2", \
             f"Expected 'value2' from node {i}, got '{response['value']}'"
@@ -147,7 +147,7 @@ def test_complex_view_changes(conductor: ClusterConductor, fx: KvsFixture):
     client2.broadcast_view(view2)
     
     # Wait for new nodes to catch up
-    time.sleep(3)
+    client2.wait_until_visible(nodes[4:6], {"key1": "value1"}, timeout=3)
     
     # Put more data
     client2.put(nodes[4], "key2", "value2")
@@ -165,22 +165,22 @@ def test_complex_view_changes(conductor: ClusterConductor, fx: KvsFixture):
     client3.send_view(nodes[1], [])  # Reset to no view
     
     # Wait for new nodes to catch up
-    time.sleep(3)
+    client3.wait_until_visible(nodes[6:8], {"key1": "value1", "key2": "value2"}, timeout=3)
     
-    # All nodes in view3 should have all data
-    for key, expected in [("key1", "value1"), ("key2", "value2")]:
-        for i in range(2, 8):
-            response = client3.get(nodes[i], key)
-            assert response["ok"], f"GET for {key} from node {i} failed with status {response['status_code']}"
-            assert response["value"] == expected, \
-                f"Expected '{expected}' for {key} from node {i}, got '{response['value']}'"
+    # All nodes in view3 should have all data; the reads are independent, so send them together
+    checks = [(key, expected, i) for key, expected in [("key1", "value1"), ("key2", "value2")] for i in range(2, 8)]
+    responses = client3.get_many([(nodes[i], key) for key, _, i in checks])
+    for (key, expected, i), response in zip(checks, responses):
+        assert response["ok"], f"GET for {key} from node {i} failed with status {response['status_code']}"
+        assert response["value"] == expected, \
+            f"Expected '{expected}' for {key} from node {i}, got '{response['value']}'"
     
     # Put more data through new nodes
     client3.put(nodes[6], "key3", "value3")
     
     # Check that all view3 nodes have the new data
-    for i in range(2, 8):
-        response = client3.get(nodes[i], "key3")
+    responses = client3.get_many([(node, "key3") for node in nodes[2:8]])
+    for i, response in enumerate(responses, start=2):
         assert response["ok"], f"GET from node {i} failed with status {response['status_code']}"
         assert response["value"] == "value3", \
             f"Expected 'value3' from node {i}, got '{response['value']}'"
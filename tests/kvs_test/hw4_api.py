@@ -1,13 +1,40 @@
 # hw4_api.py - Assignment 4 Sharding API
+import itertools
 import json
+import os
+import random
 import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol, Sequence, Dict, Any, Optional, Union
 
 import requests
+import requests.adapters
 
-from .util import log
+from .util import log, parallel_map, poll_until
+
+# nodes are reached through localhost port mappings, so connecting should be near-instant;
+# a connect that stalls is retried with backoff instead of waiting out the full request timeout
+CONNECT_TIMEOUT = 1.0
+
+# at most this many view PUTs are in flight at once during a broadcast, so a large cluster
+# doesn't have every node resharding to every other node at the same moment
+VIEW_BROADCAST_WINDOW = 8
+
+# connections a session keeps open per node; request fan-outs use at most this many threads, so
+# a large keys x nodes read never opens (and then discards) connections beyond the pool
+SESSION_POOL_SIZE = 64
+
+# set KVS_LOG_HTTP_BODIES=0 to leave response bodies out of the client logs
+LOG_HTTP_BODIES = os.environ.get("KVS_LOG_HTTP_BODIES") != "0"
+
+def _json_object(content: bytes) -> Optional[Dict[str, Any]]:
+    """The JSON object in a response body, or None if the body isn't one"""
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
 
 class _NodeLike(Protocol):
     name: str
@@ -23,112 +50,211 @@ class KvsTimeout(Exception):
     def __str__(self):
         return "request timed out"
 
+@dataclass(slots=True)
+class _LogItem:
+    id: int
+    url: str
+    method: str
+    payload: dict
+    headers: dict
+    status_code: Optional[int]
+    response_body: Optional[bytes]  # raw body, only decoded when the log is dumped
+    timed_out: bool
+
+    def json(self) -> dict:
+        return {
+            "id": self.id,
+            "url": self.url,
+            "method": self.method,
+            "payload": self.payload,
+            "headers": self.headers,
+            "status_code": self.status_code,
+            "response_text": self.response_body.decode("utf-8", errors="replace")
+            if self.response_body is not None
+            else None,
+            "timed_out": self.timed_out,
+        }
+
 class CreateClient(Protocol):
     def __call__(self, name: str) -> "KvsClient": ...
 
+# stands in for the response of any request that timed out; never mutated, so it's shared
+_TIMEOUT_RESPONSE = requests.Response()
+_TIMEOUT_RESPONSE.status_code = 408
+_TIMEOUT_RESPONSE._content = b""
+
+def new_session() -> requests.Session:
+    """Create a session that keeps connections to each node alive; safe to share between threads"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=SESSION_POOL_SIZE, max_retries=0)
+    session.mount("http://", adapter)
+    return session
+
 class KvsFixture:
     def __init__(self):
         self.clients: list[KvsClient] = []
+        # all clients share one connection pool, so concurrent clients reuse each other's connections
+        self.session = new_session()
+        # last view each node accepted, from any client in this test; only accurate as long as every
+        # view PUT goes through a client, so tests send views with the client's view methods
+        self.sent_views: dict[str, str] = {}
 
     def create_client(self, name: str) -> "KvsClient":
-        client = KvsClient(name=name)
+        client = KvsClient(name=name, session=self.session, sent_views=self.sent_views)
         self.clients.append(client)
         return client
 
+    def close(self) -> None:
+        self.session.close()
+
 class KvsClient:
-    def __init__(self, name: str, timeout: int = 10, num_retries: int = 3):
+    # a fixed attribute set; clients are created per test and every one of them keeps a log
+    __slots__ = (
+        "name",
+        "timeout",
+        "num_retries",
+        "retry_backoff",
+        "_causal_metadata",
+        "_sent_views",
+        "_owns_session",
+        "_session",
+        "_base_urls",
+        "_log",
+        "_ids",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        timeout: int = 10,
+        num_retries: int = 5,
+        retry_backoff: float = 0.05,
+        session: Optional[requests.Session] = None,
+        sent_views: Optional[dict[str, str]] = None,
+    ):
         self.name = name
         self.timeout = timeout
         self.num_retries = num_retries
+        self.retry_backoff = retry_backoff
         self.causal_metadata = {}
-        self._log = []
-        self._id = 0
+        # shared with the other clients of a fixture, so a view sent by one isn't skipped by another
+        self._sent_views = sent_views if sent_views is not None else {}
+        # reuse keep-alive connections to each node instead of reconnecting per request
+        self._owns_session = session is None
+        self._session = session if session is not None else new_session()
+        # base url per node port, built once instead of on every request
+        self._base_urls: dict[int, str] = {}
+        self._log: list[_LogItem] = []
+        # next() on a count is atomic, so ids stay unique when requests are sent from several threads
+        self._ids = itertools.count()
+
+    @property
+    def causal_metadata(self) -> Any:
+        return self._causal_metadata[0]
+
+    @causal_metadata.setter
+    def causal_metadata(self, value: Any) -> None:
+        # the X-Causal-Metadata header only changes with the metadata, so encode it here rather than per request;
+        # both are stored as one tuple so a concurrent request never sees a value with another value's header
+        self._causal_metadata = (value, json.dumps(value))
+
+    def close(self) -> None:
+        # a shared session belongs to the fixture that created it
+        if self._owns_session:
+            self._session.close()
 
     def _new_id(self) -> int:
-        id = self._id
-        self._id += 1
-        return id
+        return next(self._ids)
 
     def dump_logs(self, path: Path) -> None:
         """Dump the logs to a file"""
         path.mkdir(parents=True, exist_ok=True)
-        with (path / f"{self.name}.jsonl").open("w") as f:
-            for item in self._log:
-                json.dump(item, f)
-                f.write("\n")
+        # encode everything up front and write it in one go, using compact separators
+        lines = [json.dumps(item.json(), separators=(",", ":")) + "\n" for item in self._log]
+        (path / f"{self.name}.jsonl").write_text("".join(lines), encoding="utf-8")
 
     def _base_url(self, node: _NodeLike) -> str:
-        return f"http://localhost:{node.external_port}"
-
-    def _request(self, corr_id: int, node: _NodeLike, method: str, path: str, **kwargs) -> requests.Response:
+        url = self._base_urls.get(node.external_port)
+        if url is None:
+            url = self._base_urls[node.external_port] = f"http://localhost:{node.external_port}/"
+        return url
+
+    def _request(
+        self, corr_id: int, node: _NodeLike, method: str, path: str, adopt_metadata: bool = True, **kwargs
+    ) -> tuple[requests.Response, Optional[Dict[str, Any]]]:
         """Send HTTP request with causal metadata handling"""
-        url = f"{self._base_url(node)}/{path.lstrip('/')}"
+        # returns the response and, for an ok response, its JSON object body (None if it had none)
+        # requests sent in parallel pass adopt_metadata=False and leave causal_metadata to their caller
+        # paths are always relative ("ping", "data/<key>", "view")
+        url = self._base_url(node) + path
         response = None
         timed_out = False
+        # a caller may wait longer than usual for a slow request (e.g. a view that triggers resharding)
+        read_timeout = kwargs.pop('timeout', self.timeout)
         
-        # Add causal metadata to request body if it exists
-        if 'json' in kwargs and self.causal_metadata:
-            kwargs['json']['causal-metadata'] = self.causal_metadata
-        elif method != 'DELETE':
-            if 'json' not in kwargs:
-                kwargs['json'] = {}
-            kwargs['json']['causal-metadata'] = self.causal_metadata
+        # every request carries the client's causal metadata, read once so the body and header agree;
+        # build a new payload instead of writing into the caller's dict, and encode it once so
+        # retries resend the same bytes
+        causal_metadata, causal_metadata_header = self._causal_metadata
+        payload = {**kwargs.pop('json', {}), 'causal-metadata': causal_metadata}
+        kwargs['data'] = json.dumps(payload, separators=(",", ":")).encode()
 
         # Add X-Causal-Metadata header (Assignment 4 requirement)
-        if 'headers' not in kwargs:
-            kwargs['headers'] = {}
-        kwargs['headers']['X-Causal-Metadata'] = json.dumps(self.causal_metadata)
+        kwargs['headers'] = {
+            **kwargs.get('headers', {}),
+            'Content-Type': 'application/json',
+            'X-Causal-Metadata': causal_metadata_header,
+        }
 
         try:
             for i in range(self.num_retries):
                 try:
-                    response = getattr(requests, method)(url, timeout=self.timeout, **kwargs)
+                    response = self._session.request(
+                        method.upper(), url, timeout=(CONNECT_TIMEOUT, read_timeout), **kwargs
+                    )
                     if response.status_code == 500:
-                        return response
+                        return response, None
                     break
                 except requests.exceptions.ConnectionError:
                     if i == self.num_retries - 1:
                         raise
-                    time.sleep(0.5)
+                    # back off exponentially (capped at 0.5s), with jitter so concurrent clients don't retry in lockstep
+                    time.sleep(min(self.retry_backoff * 2**i, 0.5) + random.uniform(0, self.retry_backoff / 2))
             
             if response is None:
                 raise KvsClientException(f"failed to connect after {self.num_retries} attempts")
 
+            # parse an ok body once and hand it back with the response
+            body = _json_object(response.content) if response.ok else None
             # Update causal metadata from response if available
-            if response.ok and response.text:
-                try:
-                    response_json = response.json()
-                    if 'causal-metadata' in response_json:
-                        self.causal_metadata = response_json['causal-metadata']
-                except:
-                    pass  # Response might not be JSON
+            if adopt_metadata and body is not None and 'causal-metadata' in body:
+                self.causal_metadata = body['causal-metadata']
 
-            return response
+            return response, body
             
         except requests.exceptions.Timeout:
             timed_out = True
-            res = requests.Response()
-            res.status_code = 408
-            return res
+            return _TIMEOUT_RESPONSE, None
         finally:
-            log_entry = {
-                "id": corr_id,
-                "url": url,
-                "method": method,
-                "payload": kwargs.get("json"),
-                "headers": kwargs.get("headers", {}),
-                "status_code": response.status_code if response is not None else None,
-                "response_text": response.text if response is not None else None,
-                "timed_out": timed_out
-            }
-            self._log.append(log_entry)
+            self._log.append(
+                _LogItem(
+                    id=corr_id,
+                    url=url,
+                    method=method,
+                    payload=payload,
+                    headers=kwargs.get("headers", {}),
+                    status_code=response.status_code if response is not None else None,
+                    response_body=response.content if response is not None and LOG_HTTP_BODIES else None,
+                    timed_out=timed_out,
+                )
+            )
 
     def ping(self, node: _NodeLike) -> bool:
         """Test if a node is responsive"""
         id = self._new_id()
         log(f"client {self.name} [{id}] -> {node.name}: ping")
         try:
-            res = self._request(id, node, "get", "ping")
+            res, _ = self._request(id, node, "get", "ping")
             return res.status_code == 200
         except Exception:
             return False
@@ -140,30 +266,29 @@ class KvsClient:
         if len(key) == 0:
             raise ValueError("key cannot be empty")
         
-        res = self._request(id, node, "put", f"data/{key}", json={"value": value})
+        res, body = self._request(id, node, "put", f"data/{key}", json={"value": value})
         
         response_data = {
             "status_code": res.status_code,
             "ok": res.ok
         }
         
-        if res.ok and res.text:
-            try:
-                response_json = res.json()
-                response_data["causal_metadata"] = response_json.get("causal-metadata", {})
-            except:
-                response_data["causal_metadata"] = {}
+        if res.ok and res.content:
+            response_data["causal_metadata"] = (body or {}).get("causal-metadata", {})
         
         return response_data
 
     def get(self, node: _NodeLike, key: str) -> Dict[str, Any]:
         """Get a value (with automatic sharding/proxying)"""
+        return self._get(node, key)
+
+    def _get(self, node: _NodeLike, key: str, adopt_metadata: bool = True) -> Dict[str, Any]:
         id = self._new_id()
         log(f"client {self.name} [{id}] -> {node.name}: get {key!r}")
         if len(key) == 0:
             raise ValueError("key cannot be empty")
         
-        res = self._request(id, node, "get", f"data/{key}", json={})
+        res, data = self._request(id, node, "get", f"data/{key}", adopt_metadata=adopt_metadata, json={})
         
         response_data = {
             "status_code": res.status_code,
@@ -171,23 +296,22 @@ class KvsClient:
             "value": None
         }
         
-        if res.ok and res.text:
-            try:
-                data = res.json()
-                response_data["value"] = data.get("value")
-                response_data["causal_metadata"] = data.get("causal-metadata", {})
-                log(f"client {self.name} [{id}] -> {node.name}: get {key!r} |> {response_data['value']!r}")
-            except:
-                pass
+        if data is not None:
+            response_data["value"] = data.get("value")
+            response_data["causal_metadata"] = data.get("causal-metadata", {})
+            log(f"client {self.name} [{id}] -> {node.name}: get {key!r} |> {response_data['value']!r}")
         
         return response_data
 
     def get_all(self, node: _NodeLike) -> Dict[str, Any]:
         """Get all key-value pairs from this node's shard only"""
+        return self._get_all(node)
+
+    def _get_all(self, node: _NodeLike, adopt_metadata: bool = True) -> Dict[str, Any]:
         id = self._new_id()
         log(f"client {self.name} [{id}] -> {node.name}: list (shard-local)")
         
-        res = self._request(id, node, "get", "data", json={})
+        res, data = self._request(id, node, "get", "data", adopt_metadata=adopt_metadata, json={})
         
         response_data = {
             "status_code": res.status_code,
@@ -195,68 +319,110 @@ class KvsClient:
             "values": {}
         }
         
-        if res.ok and res.text:
-            try:
-                data = res.json()
-                response_data["values"] = data.get("items", {})
-                response_data["causal_metadata"] = data.get("causal-metadata", {})
-                log(f"client {self.name} [{id}] -> {node.name}: list |> [{len(response_data['values'])} items]")
-            except:
-                pass
+        if data is not None:
+            response_data["values"] = data.get("items", {})
+            response_data["causal_metadata"] = data.get("causal-metadata", {})
+            log(f"client {self.name} [{id}] -> {node.name}: list |> [{len(response_data['values'])} items]")
         
         return response_data
 
-    def send_view(self, node: _NodeLike, view: Sequence[_NodeLike]) -> bool:
-        """Send a legacy view update to a node"""
+    def get_many(self, pairs: Sequence[tuple[_NodeLike, str]]) -> list[Dict[str, Any]]:
+        """Get every (node, key) pair concurrently and return the responses in the same order"""
+        # which read finishes last depends on thread timing, so the reads leave causal_metadata alone
+        # and the client adopts it from the last ok response in request order instead
+        responses = parallel_map(
+            lambda pair: self._get(pair[0], pair[1], adopt_metadata=False), pairs, max_workers=SESSION_POOL_SIZE
+        )
+        self._adopt_last_metadata(responses)
+        return responses
+
+    def _adopt_last_metadata(self, responses: Sequence[Dict[str, Any]]) -> None:
+        for r in reversed(responses):
+            if r.get("causal_metadata"):
+                self.causal_metadata = r["causal_metadata"]
+                return
+
+    def _send_view_payload(
+        self, node: _NodeLike, view_payload: Any, description: str, timeout: Optional[float] = None
+    ) -> bool:
+        # the PUT /view itself; callers build the payload and its log description once per view
         id = self._new_id()
-        view_ = [dict(address=f"{n.ip}:8081", id=n.index) for n in view]
-        log(f"client {self.name} [{id}] -> {node.name}: legacy view {[f'{n.name} (addr={n.ip}:8081, id={n.index})' for n in view]}")
+        key = json.dumps(view_payload, separators=(",", ":"))
+        if self._sent_views.get(node.name) == key:
+            log(f"client {self.name} [{id}] -> {node.name}: {description} (unchanged, skipped)")
+            return True
+        log(f"client {self.name} [{id}] -> {node.name}: {description}")
         
-        res = self._request(id, node, "put", "view", json={"view": view_})
+        read_timeout = self.timeout if timeout is None else timeout
+        try:
+            res, _ = self._request(id, node, "put", "view", json={"view": view_payload}, timeout=read_timeout)
+        except Exception:
+            # the node may or may not have applied it
+            self._sent_views.pop(node.name, None)
+            raise
+        if res.ok:
+            self._sent_views[node.name] = key
+        else:
+            # the node may or may not have applied it
+            self._sent_views.pop(node.name, None)
         return res.ok
 
+    @staticmethod
+    def _legacy_view_payload(view: Sequence[_NodeLike]) -> tuple[list, str]:
+        view_ = [dict(address=f"{n.ip}:8081", id=n.index) for n in view]
+        return view_, f"legacy view {[f'{n.name} (addr={n.ip}:8081, id={n.index})' for n in view]}"
+
+    @staticmethod
+    def _sharded_view_payload(sharded_view: Dict[str, Sequence[_NodeLike]]) -> tuple[dict, str]:
+        # Convert to Assignment 4 sharded format
+        view_obj = {
+            shard_name: [{"address": f"{n.ip}:8081", "id": n.index} for n in shard_nodes]
+            for shard_name, shard_nodes in sharded_view.items()
+        }
+        return view_obj, f"sharded view {list(view_obj.keys())}"
+
+    def send_view(self, node: _NodeLike, view: Sequence[_NodeLike]) -> bool:
+        """Send a legacy view update to a node"""
+        return self._send_view_payload(node, *self._legacy_view_payload(view))
+
     def send_sharded_view(self, node: _NodeLike, sharded_view: Dict[str, Sequence[_NodeLike]]) -> bool:
         """Send a sharded view update to a node"""
-        id = self._new_id()
-        
-        # Convert to Assignment 4 sharded format
-        view_obj = {}
-        for shard_name, shard_nodes in sharded_view.items():
-            view_obj[shard_name] = [
-                {"address": f"{n.ip}:8081", "id": n.index} 
-                for n in shard_nodes
-            ]
-        
-        log(f"client {self.name} [{id}] -> {node.name}: sharded view {list(view_obj.keys())}")
-        
-        res = self._request(id, node, "put", "view", json={"view": view_obj})
-        return res.ok
+        return self._send_view_payload(node, *self._sharded_view_payload(sharded_view))
+
+    def send_view_body(self, node: _NodeLike, view: Union[list, dict], timeout: Optional[float] = None) -> bool:
+        """Send a view already in request form (a list of address/id dicts, or shard name -> list) to a node"""
+        description = f"sharded view {list(view)}" if isinstance(view, dict) else f"legacy view {view}"
+        return self._send_view_payload(node, view, description, timeout)
 
     def broadcast_view(self, nodes: Sequence[_NodeLike]) -> bool:
         """Broadcast a legacy view update to all nodes"""
         log(f"client {self.name}: broadcast legacy view")
-        success = True
-        for node in nodes:
-            if not self.send_view(node, nodes):
-                success = False
-        return success
+        view_payload, description = self._legacy_view_payload(nodes)
+        # views are independent per node, so send them concurrently, at most VIEW_BROADCAST_WINDOW at a time
+        return all(
+            parallel_map(
+                lambda node: self._send_view_payload(node, view_payload, description),
+                nodes,
+                max_workers=VIEW_BROADCAST_WINDOW,
+            )
+        )
 
     def broadcast_sharded_view(self, sharded_view: Dict[str, Sequence[_NodeLike]]) -> bool:
         """Broadcast a sharded view to all nodes in the view"""
         log(f"client {self.name}: broadcast sharded view")
-        success = True
-        
-        # Get all nodes across all shards
-        all_nodes = []
-        for shard_nodes in sharded_view.values():
-            all_nodes.extend(shard_nodes)
-        
-        # Send sharded view to all nodes
-        for node in all_nodes:
-            if not self.send_sharded_view(node, sharded_view):
-                success = False
-        
-        return success
+        view_payload, description = self._sharded_view_payload(sharded_view)
+        
+        # Get all nodes across all shards, once each
+        all_nodes = {n.index: n for shard_nodes in sharded_view.values() for n in shard_nodes}
+        
+        # Send sharded view to all nodes concurrently, at most VIEW_BROADCAST_WINDOW at a time
+        return all(
+            parallel_map(
+                lambda node: self._send_view_payload(node, view_payload, description),
+                all_nodes.values(),
+                max_workers=VIEW_BROADCAST_WINDOW,
+            )
+        )
     
     def reset_causal_metadata(self):
         """Reset the client's causal metadata to empty"""
@@ -264,36 +430,25 @@ class KvsClient:
 
     def get_shard_data(self, nodes: Sequence[_NodeLike]) -> Dict[str, Dict[str, str]]:
         """Get data from each shard separately (for distribution analysis)"""
-        shard_data = {}
-        
-        for i, node in enumerate(nodes):
-            shard_name = f"shard_{i}"
-            result = self.get_all(node)
-            if result["ok"]:
-                shard_data[shard_name] = result["values"]
-            else:
-                shard_data[shard_name] = {}
-        
-        return shard_data
+        # each node lists only its own shard, so all the listings can be fetched at once;
+        # like get_many, the metadata is adopted afterwards so it doesn't depend on thread timing
+        results = parallel_map(lambda node: self._get_all(node, adopt_metadata=False), nodes)
+        self._adopt_last_metadata(results)
+        return {f"shard_{i}": result["values"] if result["ok"] else {} for i, result in enumerate(results)}
 
     def verify_key_distribution(self, keys: Sequence[str], nodes: Sequence[_NodeLike]) -> Dict[str, Any]:
         """Verify that keys are properly distributed across shards"""
         shard_data = self.get_shard_data(nodes)
         
         # Count keys per shard
-        distribution = {}
-        total_keys = 0
-        all_found_keys = set()
-        
-        for shard_name, shard_keys in shard_data.items():
-            count = len(shard_keys)
-            distribution[shard_name] = count
-            total_keys += count
-            all_found_keys.update(shard_keys.keys())
+        distribution = {shard_name: len(shard_keys) for shard_name, shard_keys in shard_data.items()}
+        total_keys = sum(distribution.values())
+        all_found_keys = set().union(*shard_data.values())
         
         # Check for missing or duplicated keys
-        missing_keys = set(keys) - all_found_keys
-        extra_keys = all_found_keys - set(keys)
+        expected_keys = set(keys)
+        missing_keys = expected_keys - all_found_keys
+        extra_keys = all_found_keys - expected_keys
         
         return {
             "distribution": distribution,
@@ -306,29 +461,17 @@ class KvsClient:
     def wait_for_convergence(self, keys: Sequence[str], nodes: Sequence[_NodeLike], 
                            max_wait: float = 10.0) -> bool:
         """Wait for eventual consistency across all shards"""
-        start_time = time.time()
+        pairs = [(node, key) for key in keys for node in nodes]
         
-        while time.time() - start_time < max_wait:
+        def read_all():
+            # every key from every node at once; a read that errors counts as not yet accessible
             try:
-                # Check if all keys are accessible from all nodes
-                all_accessible = True
-                for key in keys:
-                    for node in nodes:
-                        result = self.get(node, key)
-                        if not result["ok"]:
-                            all_accessible = False
-                            break
-                    if not all_accessible:
-                        break
-                
-                if all_accessible:
-                    return True
-                
-                time.sleep(0.5)
-            except:
-                time.sleep(0.5)
+                return [r["ok"] for r in self.get_many(pairs)]
+            except requests.RequestException:
+                return [False]
         
-        return False
+        # Check if all keys are accessible from all nodes
+        return all(poll_until(read_all, all, timeout=max_wait, initial_delay=0.1))
 
     def test_causal_consistency_across_shards(self, nodes: Sequence[_NodeLike]) -> bool:
         """Test that causal consistency is maintained across shard boundaries"""
@@ -429,21 +572,16 @@ def nodes_to_shard_view(nodes: Sequence[_NodeLike], num_shards: int = 2) -> Dict
 
 def analyze_key_distribution(shard_data: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
     """Analyze key distribution across shards for load balancing"""
-    total_keys = sum(len(keys) for keys in shard_data.values())
+    # count each shard once and derive every metric from the counts
+    distribution = {shard_name: len(keys) for shard_name, keys in shard_data.items()}
+    total_keys = sum(distribution.values())
     
     if total_keys == 0:
         return {"total_keys": 0, "balance_score": 1.0, "distribution": {}}
     
     # Calculate distribution metrics
-    distribution = {}
-    max_keys = 0
-    min_keys = float('inf')
-    
-    for shard_name, keys in shard_data.items():
-        count = len(keys)
-        distribution[shard_name] = count
-        max_keys = max(max_keys, count)
-        min_keys = min(min_keys, count)
+    max_keys = max(distribution.values())
+    min_keys = min(distribution.values())
     
     # Calculate balance score (1.0 = perfect balance, 0.0 = worst balance)
     if max_keys == 0:
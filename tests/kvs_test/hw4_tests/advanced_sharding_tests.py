@@ -1,7 +1,7 @@
 # advanced_sharding_tests.py
 import time
 from ..containers import ClusterConductor
-from ..hw3_api import KvsFixture
+from ..hw4_api import KvsFixture
 from ..testcase import TestCase
 from ..util import log
 
@@ -25,15 +25,9 @@ def test_complex_resharding_scenario(conductor: ClusterConductor, fx: KvsFixture
     }
     
     # Apply first view
-    import requests
     for node in nodes[:4]:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view1},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view1)
         except Exception as e:
             return False, f"Failed to set view1: {e}"
     
@@ -71,12 +65,7 @@ def test_complex_resharding_scenario(conductor: ClusterConductor, fx: KvsFixture
     log("Expanding to 4 shards...")
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view2},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view2)
         except Exception as e:
             return False, f"Failed to set view2: {e}"
     
@@ -106,12 +95,7 @@ def test_complex_resharding_scenario(conductor: ClusterConductor, fx: KvsFixture
     log("Contracting to 3 shards...")
     for node in nodes[:6]:  # Only nodes in the new view
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view3},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view3)
         except Exception as e:
             return False, f"Failed to set view3: {e}"
     
@@ -147,15 +131,9 @@ def test_shard_failure_handling(conductor: ClusterConductor, fx: KvsFixture):
         ]
     }
     
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view)
         except Exception as e:
             return False, f"Failed to set view: {e}"
     
@@ -228,15 +206,9 @@ def test_large_scale_sharding(conductor: ClusterConductor, fx: KvsFixture):
         ]
     }
     
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view)
         except Exception as e:
             return False, f"Failed to set view: {e}"
     
@@ -310,15 +282,9 @@ def test_concurrent_resharding_and_operations(conductor: ClusterConductor, fx: K
         ]
     }
     
-    import requests
     for node in nodes[:4]:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": initial_view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client1.send_view_body(node, initial_view)
         except Exception as e:
             return False, f"Failed to set initial view: {e}"
     
@@ -351,12 +317,7 @@ def test_concurrent_resharding_and_operations(conductor: ClusterConductor, fx: K
     # Apply new view
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": new_view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client1.send_view_body(node, new_view)
         except Exception as e:
             return False, f"Failed to set new view: {e}"
     
@@ -412,15 +373,9 @@ def test_cross_shard_causal_dependencies(conductor: ClusterConductor, fx: KvsFix
         ]
     }
     
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view)
         except Exception as e:
             return False, f"Failed to set view: {e}"
     
@@ -1,7 +1,7 @@
 # basic_sharding_tests.py
 import time
 from ..containers import ClusterConductor
-from ..hw3_api import KvsFixture
+from ..hw4_api import KvsFixture
 from ..testcase import TestCase
 from ..util import log
 
@@ -49,18 +49,8 @@ def test_basic_two_shard_setup(conductor: ClusterConductor, fx: KvsFixture):
     
     # Send sharded view to all nodes
     for node in nodes:
-        response = client.send_view(node, [])  # Empty for direct call
-        # We need to manually send the sharded view
-        import requests
-        import json
-        
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200, f"View update failed for node {node.index}: {resp.status_code}"
+            assert client.send_view_body(node, view), f"View update failed for node {node.index}"
         except Exception as e:
             log(f"Error updating view for node {node.index}: {e}")
             return False, f"Failed to update view: {e}"
@@ -103,15 +93,9 @@ def test_key_distribution_across_shards(conductor: ClusterConductor, fx: KvsFixt
     }
     
     # Send sharded view to all nodes
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200, f"View update failed for node {node.index}"
+            assert client.send_view_body(node, view), f"View update failed for node {node.index}"
         except Exception as e:
             return False, f"Failed to update view: {e}"
     
@@ -176,15 +160,9 @@ def test_causal_consistency_across_shards(conductor: ClusterConductor, fx: KvsFi
     }
     
     # Send sharded view
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view)
         except Exception as e:
             return False, f"Failed to update view: {e}"
     
@@ -251,15 +229,9 @@ def test_transparent_proxying(conductor: ClusterConductor, fx: KvsFixture):
     }
     
     # Send sharded view
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view)
         except Exception as e:
             return False, f"Failed to update view: {e}"
     
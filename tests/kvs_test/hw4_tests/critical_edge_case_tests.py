@@ -3,7 +3,7 @@ import threading
 import time
 
 from ..containers import ClusterConductor
-from ..hw3_api import KvsFixture
+from ..hw4_api import KvsFixture
 from ..testcase import TestCase
 from ..util import log
 
@@ -22,11 +22,9 @@ def test_key_assignment_consistency(conductor: ClusterConductor, fx: KvsFixture)
         "ConsistentC": [{"address": f"{nodes[4].ip}:8081", "id": nodes[4].index}, {"address": f"{nodes[5].ip}:8081", "id": nodes[5].index}],
     }
 
-    import requests
 
     for node in nodes:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": view}, timeout=10)
-        assert resp.status_code == 200
+        assert client.send_view_body(node, view)
 
     time.sleep(2)
 
@@ -78,11 +76,9 @@ def test_deep_cross_shard_causal_chains(conductor: ClusterConductor, fx: KvsFixt
         "ChainC": [{"address": f"{nodes[4].ip}:8081", "id": nodes[4].index}, {"address": f"{nodes[5].ip}:8081", "id": nodes[5].index}],
     }
 
-    import requests
 
     for node in nodes:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": view}, timeout=10)
-        assert resp.status_code == 200
+        assert client.send_view_body(node, view)
 
     time.sleep(2)
 
@@ -134,11 +130,9 @@ def test_partial_shard_recovery(conductor: ClusterConductor, fx: KvsFixture):
         "RecoverC": [{"address": f"{nodes[4].ip}:8081", "id": nodes[4].index}, {"address": f"{nodes[5].ip}:8081", "id": nodes[5].index}],
     }
 
-    import requests
 
     for node in nodes:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": view}, timeout=10)
-        assert resp.status_code == 200
+        assert client.send_view_body(node, view)
 
     time.sleep(2)
 
@@ -201,11 +195,9 @@ def test_cross_shard_concurrent_write_conflicts(conductor: ClusterConductor, fx:
 
     view = {"ConflictA": [{"address": f"{nodes[0].ip}:8081", "id": nodes[0].index}, {"address": f"{nodes[1].ip}:8081", "id": nodes[1].index}], "ConflictB": [{"address": f"{nodes[2].ip}:8081", "id": nodes[2].index}, {"address": f"{nodes[3].ip}:8081", "id": nodes[3].index}]}
 
-    import requests
 
     for node in nodes:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": view}, timeout=10)
-        assert resp.status_code == 200
+        assert client1.send_view_body(node, view)
 
     time.sleep(2)
 
@@ -258,11 +250,9 @@ def test_shard_failure_during_data_migration(conductor: ClusterConductor, fx: Kv
     # Start with 2 shards
     initial_view = {"MigrationA": [{"address": f"{nodes[0].ip}:8081", "id": nodes[0].index}, {"address": f"{nodes[1].ip}:8081", "id": nodes[1].index}], "MigrationB": [{"address": f"{nodes[2].ip}:8081", "id": nodes[2].index}, {"address": f"{nodes[3].ip}:8081", "id": nodes[3].index}]}
 
-    import requests
 
     for node in nodes[:4]:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": initial_view}, timeout=10)
-        assert resp.status_code == 200
+        assert client.send_view_body(node, initial_view)
 
     time.sleep(2)
 
@@ -284,7 +274,7 @@ def test_shard_failure_during_data_migration(conductor: ClusterConductor, fx: Kv
     def apply_view():
         for node in nodes[:6]:
             try:
-                requests.put(f"http://localhost:{node.external_port}/view", json={"view": new_view}, timeout=10)
+                client.send_view_body(node, new_view)
             except:
                 pass  # Expected for killed nodes
 
@@ -324,12 +314,10 @@ def test_many_shards_performance(conductor: ClusterConductor, fx: KvsFixture):
     for i in range(8):
         view[f"PerfShard{i}"] = [{"address": f"{nodes[i].ip}:8081", "id": nodes[i].index}]
 
-    import requests
 
     start_time = time.time()
     for node in nodes:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": view}, timeout=10)
-        assert resp.status_code == 200
+        assert client.send_view_body(node, view)
 
     view_time = time.time() - start_time
     log(f"View setup time: {view_time:.2f}s")
@@ -385,11 +373,9 @@ def test_proxy_request_failures(conductor: ClusterConductor, fx: KvsFixture):
         "ProxyC": [{"address": f"{nodes[4].ip}:8081", "id": nodes[4].index}, {"address": f"{nodes[5].ip}:8081", "id": nodes[5].index}],
     }
 
-    import requests
 
     for node in nodes:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": view}, timeout=10)
-        assert resp.status_code == 200
+        assert client.send_view_body(node, view)
 
     time.sleep(2)
 
@@ -447,11 +433,9 @@ def test_large_dataset_resharding(conductor: ClusterConductor, fx: KvsFixture):
     # Start with 2 shards
     initial_view = {"LargeA": [{"address": f"{nodes[0].ip}:8081", "id": nodes[0].index}, {"address": f"{nodes[1].ip}:8081", "id": nodes[1].index}], "LargeB": [{"address": f"{nodes[2].ip}:8081", "id": nodes[2].index}, {"address": f"{nodes[3].ip}:8081", "id": nodes[3].index}]}
 
-    import requests
 
     for node in nodes[:4]:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": initial_view}, timeout=10)
-        assert resp.status_code == 200
+        assert client.send_view_body(node, initial_view)
 
     time.sleep(2)
 
@@ -487,8 +471,7 @@ def test_large_dataset_resharding(conductor: ClusterConductor, fx: KvsFixture):
     reshard_start = time.time()
 
     for node in nodes:
-        resp = requests.put(f"http://localhost:{node.external_port}/view", json={"view": new_view}, timeout=15)
-        assert resp.status_code == 200
+        assert client.send_view_body(node, new_view, timeout=15)
 
     time.sleep(5)  # Wait for resharding
 
@@ -1,7 +1,7 @@
 # performance_tests.py
 import time
 from ..containers import ClusterConductor
-from ..hw3_api import KvsFixture
+from ..hw4_api import KvsFixture
 from ..testcase import TestCase
 from ..util import log
 
@@ -24,15 +24,9 @@ def test_resharding_performance(conductor: ClusterConductor, fx: KvsFixture):
         ]
     }
     
-    import requests
     for node in nodes[:4]:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": initial_view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, initial_view)
         except Exception as e:
             return False, f"Failed to set initial view: {e}"
     
@@ -76,12 +70,7 @@ def test_resharding_performance(conductor: ClusterConductor, fx: KvsFixture):
     
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": new_view},
-                timeout=15
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, new_view, timeout=15)
         except Exception as e:
             return False, f"Failed to set new view: {e}"
     
@@ -146,15 +135,9 @@ def test_throughput_with_sharding(conductor: ClusterConductor, fx: KvsFixture):
         ]
     }
     
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view)
         except Exception as e:
             return False, f"Failed to set view: {e}"
     
@@ -222,15 +205,9 @@ def test_proxy_overhead(conductor: ClusterConductor, fx: KvsFixture):
         ]
     }
     
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert client.send_view_body(node, view)
         except Exception as e:
             return False, f"Failed to set view: {e}"
     
@@ -319,7 +296,6 @@ def test_scalability_with_more_shards(conductor: ClusterConductor, fx: KvsFixtur
         }
     ]
     
-    import requests
     
     for config_idx, view_config in enumerate(shard_configs):
         num_shards = len(view_config)
@@ -328,12 +304,7 @@ def test_scalability_with_more_shards(conductor: ClusterConductor, fx: KvsFixtur
         # Apply configuration
         for node in nodes:
             try:
-                resp = requests.put(
-                    f"http://localhost:{node.external_port}/view",
-                    json={"view": view_config},
-                    timeout=10
-                )
-                assert resp.status_code == 200
+                assert client.send_view_body(node, view_config)
             except Exception as e:
                 return False, f"Failed to set {num_shards}-shard view: {e}"
         
@@ -413,15 +384,9 @@ def test_concurrent_load_performance(conductor: ClusterConductor, fx: KvsFixture
         ]
     }
     
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
-                f"http://localhost:{node.external_port}/view",
-                json={"view": view},
-                timeout=10
-            )
-            assert resp.status_code == 200
+            assert clients[0].send_view_body(node, view)
         except Exception as e:
             return False, f"Failed to set view: {e}"
     
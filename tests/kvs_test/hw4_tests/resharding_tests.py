@@ -1,7 +1,7 @@
 # resharding_tests.py
 import time
 from ..containers import ClusterConductor
-from ..hw3_api import KvsFixture
+from ..hw4_api import KvsFixture
 from ..testcase import TestCase
 from ..util import log
 
@@ -25,10 +25,9 @@ def test_shard_add_resharding(conductor: ClusterConductor, fx: KvsFixture):
     }
     
     # Send initial view
-    import requests
     for node in nodes[:4]:  # Only first 4 nodes initially
         try:
-            resp = requests.put(
+            resp = fx.session.put(
                 f"http://localhost:{node.external_port}/view",
                 json={"view": initial_view},
                 timeout=10
@@ -73,7 +72,7 @@ def test_shard_add_resharding(conductor: ClusterConductor, fx: KvsFixture):
     # Send new view to all nodes (including new ones)
     for node in nodes:
         try:
-            resp = requests.put(
+            resp = fx.session.put(
                 f"http://localhost:{node.external_port}/view",
                 json={"view": new_view},
                 timeout=10
@@ -133,10 +132,9 @@ def test_shard_removal_resharding(conductor: ClusterConductor, fx: KvsFixture):
         ]
     }
     
-    import requests
     for node in nodes:
         try:
-            resp = requests.put(
+            resp = fx.session.put(
                 f"http://localhost:{node.external_port}/view",
                 json={"view": initial_view},
                 timeout=10
@@ -179,7 +177,7 @@ def test_shard_removal_resharding(conductor: ClusterConductor, fx: KvsFixture):
     remaining_nodes = [nodes[0], nodes[1], nodes[4], nodes[5]]
     for node in remaining_nodes:
         try:
-            resp = requests.put(
+            resp = fx.session.put(
                 f"http://localhost:{node.external_port}/view",
                 json={"view": new_view},
                 timeout=10
@@ -229,10 +227,9 @@ def test_minimal_data_movement(conductor: ClusterConductor, fx: KvsFixture):
         ]
     }
     
-    import requests
     for node in nodes[:4]:
         try:
-            resp = requests.put(
+            resp = fx.session.put(
                 f"http://localhost:{node.external_port}/view",
                 json={"view": initial_view},
                 timeout=10
@@ -282,7 +279,7 @@ def test_minimal_data_movement(conductor: ClusterConductor, fx: KvsFixture):
     
     for node in nodes:
         try:
-            resp = requests.put(
+            resp = fx.session.put(
                 f"http://localhost:{node.external_port}/view",
                 json={"view": new_view},
                 timeout=10
@@ -342,10 +339,9 @@ def test_resharding_preserves_causality(conductor: ClusterConductor, fx: KvsFixt
         ]
     }
     
-    import requests
     for node in nodes[:4]:
         try:
-            resp = requests.put(
+            resp = fx.session.put(
                 f"http://localhost:{node.external_port}/view",
                 json={"view": initial_view},
                 timeout=10
@@ -397,7 +393,7 @@ def test_resharding_preserves_causality(conductor: ClusterConductor, fx: KvsFixt
     
     for node in nodes:
         try:
-            resp = requests.put(
+            resp = fx.session.put(
                 f"http://localhost:{node.external_port}/view",
                 json={"view": new_view},
                 timeout=10
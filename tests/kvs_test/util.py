@@ -1,33 +1,37 @@
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from contextvars import ContextVar
-from typing import Generator
+from contextvars import ContextVar, copy_context
+from typing import Callable, Generator, Iterable, TypeVar
 
-LOG_BUFFER = ""
+T = TypeVar("T")
+R = TypeVar("R")
+
+# lines are appended and only joined when read: repeated += on a str copies the whole buffer every
+# time, and list.append can't drop lines when several threads log at once
+_LOG_LINES: list[str] = []
 
 
 def log(*args):
+    formatted = " ".join(map(str, args))
     if (c := _log_capture.get()) is not None:
-        c.log(*args)
+        c.lines.append(formatted)
 
     # log to stderr
-    print(*args, file=sys.stderr)
+    print(formatted, file=sys.stderr)
 
     # log to buffer
-    global LOG_BUFFER
-    formatted = " ".join(map(str, args))
-    LOG_BUFFER += formatted + "\n"
+    _LOG_LINES.append(formatted)
 
 
 def log_buffer_reset():
-    global LOG_BUFFER
-    LOG_BUFFER = ""
+    _LOG_LINES.clear()
 
 
 def get_log_buffer():
-    global LOG_BUFFER
-    return LOG_BUFFER
+    return "".join(line + "\n" for line in _LOG_LINES)
 
 
 @contextmanager
@@ -40,17 +44,50 @@ def capture_logs() -> Generator["LogCapture", None, None]:
 
 class LogCapture:
     def __init__(self):
-        self.buffer = ""
+        self.lines: list[str] = []
+
+    @property
+    def buffer(self) -> str:
+        return "".join(line + "\n" for line in self.lines)
 
     def log(self, *args):
         # log to buffer
-        formatted = " ".join(map(str, args))
-        self.buffer += formatted + "\n"
+        self.lines.append(" ".join(map(str, args)))
 
 
 _log_capture: ContextVar[LogCapture | None] = ContextVar("_log_interceptor", default=None)
 
 
+def parallel_map(fn: Callable[[T], R], items: Iterable[T], max_workers: int | None = None) -> list[R]:
+    """Map fn over items on a thread pool, preserving order and the caller's log capture"""
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or len(items)) as pool:
+        # each task runs in its own copy of the caller's context so capture_logs() still sees its output
+        futures = [pool.submit(copy_context().run, fn, item) for item in items]
+        return [f.result() for f in futures]
+
+
+def poll_until(
+    fn: Callable[[], R],
+    done: Callable[[R], bool],
+    timeout: float = 5.0,
+    initial_delay: float = 0.05,
+    max_delay: float = 0.5,
+) -> R:
+    """Call fn until done(result) holds or timeout seconds pass, backing off exponentially; returns the last result"""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        result = fn()
+        remaining = deadline - time.monotonic()
+        if done(result) or remaining <= 0:
+            return result
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
 def get_logger(prefix: str):
     return lambda *args: log(f"{prefix}: ", *args)
 